@@ -2,8 +2,12 @@
 FSQL Studio (2025-10-31)
 """
 
-import os, re, sys, csv, json, time, shutil, traceback, webbrowser
+import os, re, sys, csv, copy, json, time, heapq, queue, codecs, shutil, threading, traceback, webbrowser
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache, partial
+from itertools import accumulate, groupby
 from pathlib import Path
 
 import tkinter as tk
@@ -12,16 +16,40 @@ from tkinter import ttk, filedialog, messagebox
 import duckdb
 import pandas as pd
 from pandas import DataFrame
+openpyxl = None  # imported on first Excel use, see _openpyxl()
 try:
-    import openpyxl
+    from python_calamine import CalamineWorkbook
 except Exception:
-    openpyxl = None
+    CalamineWorkbook = None
+try:
+    import fastexcel
+except Exception:
+    fastexcel = None
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except Exception:
+    pa = pc = pacsv = None
+try:
+    import orjson
+except Exception:
+    orjson = None
+try:
+    import regex as _rx  # optional faster engine for user Find/Replace patterns; API-compatible with re
+except ImportError:
+    _rx = re
+try:
+    import xlsxwriter
+except Exception:
+    xlsxwriter = None
 
 APP_TITLE = "FSQL Studio"
 CONFIG_DIR = Path.home() / ".fsql_studio"
 CONFIG_DIR.mkdir(parents=True, exist_ok=True)
 SETTINGS_PATH = CONFIG_DIR / "settings.json"
 RECENTS_PATH  = CONFIG_DIR / "recent_servers.json"
+CSV_CACHE_PATH = CONFIG_DIR / "catalog_cache.json"
 
 SUPPORTED_EXTS = {".csv", ".tsv", ".txt", ".xlsx", ".xls"}
 
@@ -34,12 +62,18 @@ class _ToolTip:
         self.wrap = wrap
         self._after_id = None
         self._tip = None
+        self._armed = False
         widget.bind("<Enter>", self._schedule, add=True)
-        widget.bind("<Leave>", self._hide, add=True)
-        widget.bind("<ButtonPress>", self._hide, add=True)
-        widget.bind("<Destroy>", self._hide, add=True)
+
+    def _arm(self):
+        """The hide handlers are only bound once the widget is hovered for the first time."""
+        self._armed = True
+        self.widget.bind("<Leave>", self._hide, add=True)
+        self.widget.bind("<ButtonPress>", self._hide, add=True)
+        self.widget.bind("<Destroy>", self._hide, add=True)
 
     def _schedule(self, _=None):
+        if not self._armed: self._arm()
         self._unschedule()
         self._after_id = self.widget.after(self.delay, self._show)
 
@@ -83,17 +117,44 @@ class _ToolTip:
             self._tip = None
 
 
+def _openpyxl():
+    """Imports openpyxl on first use; returns None when it is not installed."""
+    global openpyxl
+    if openpyxl is None:
+        try:
+            import openpyxl as _op
+            openpyxl = _op
+        except Exception:
+            openpyxl = False
+    return openpyxl or None
+
+def _json_loads(b: bytes):
+    return orjson.loads(b) if orjson is not None else json.loads(b.decode("utf-8"))
+
+def _json_dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+_json_cache: dict[Path, tuple] = {}  # path -> ((mtime_ns, size), parsed)
+
 def _load_json(p: Path, default):
+    """Parsed once per file version (mtime/size); callers get their own copy to mutate."""
     try:
-        with open(p, "r", encoding="utf-8") as f:
-            return json.load(f)
+        st = p.stat()
+        key = (st.st_mtime_ns, st.st_size)
+        hit = _json_cache.get(p)
+        if hit is None or hit[0] != key:
+            with open(p, "rb") as f:
+                hit = _json_cache[p] = (key, _json_loads(f.read()))
+        return copy.deepcopy(hit[1])
     except Exception:
         return default
 
 def _save_json(p: Path, data):
     try:
-        with open(p, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(p, "wb") as f:
+            f.write(_json_dumps(data))
     except Exception:
         pass
 
@@ -121,24 +182,31 @@ def sniff_delimiter(path: Path, default: str = ",") -> str:
     except Exception:
         return "\t" if path.suffix.lower() == ".tsv" else default
 
-def sniff_encoding(path: Path) -> str:
-    """Attempts to detect encoding from BOM; default is UTF-8."""
+_BOM4 = {b"\xff\xfe\x00\x00": "utf-32-le", b"\x00\x00\xfe\xff": "utf-32-be"}
+_BOM3 = {b"\xef\xbb\xbf": "utf-8-sig"}
+_BOM2 = {b"\xff\xfe": "utf-16-le", b"\xfe\xff": "utf-16-be"}
+
+def _bom_encoding(b: bytes) -> str:
+    """Encoding from the BOM at the start of b; default is UTF-8."""
+    return _BOM4.get(b[:4]) or _BOM3.get(b[:3]) or _BOM2.get(b[:2]) or "utf-8"
+
+def sniff_file(path: Path, default: str = ",") -> tuple[str, str]:
+    """(encoding, delimiter) from a single 64 KiB read; BOM rules of _bom_encoding, Sniffer rules of sniff_delimiter."""
+    fallback = "\t" if path.suffix.lower() == ".tsv" else default
     try:
         with open(path, "rb") as f:
-            b = f.read(4)
-        if b.startswith(b"\xff\xfe\x00\x00"):
-            return "utf-32-le"
-        if b.startswith(b"\x00\x00\xfe\xff"):
-            return "utf-32-be"
-        if b.startswith(b"\xff\xfe"):
-            return "utf-16-le"
-        if b.startswith(b"\xfe\xff"):
-            return "utf-16-be"
-        if b.startswith(b"\xef\xbb\xbf"):
-            return "utf-8-sig"
+            raw = f.read(64 * 1024)
     except Exception:
-        pass
-    return "utf-8"
+        return "utf-8", fallback
+    enc = _bom_encoding(raw)
+    try:
+        sample = raw.decode(enc, errors="ignore")
+        if not sample:
+            return enc, fallback
+        dialect = csv.Sniffer().sniff(sample, delimiters=[",", "\t", ";", "|", "^"])
+        return enc, dialect.delimiter or default
+    except Exception:
+        return enc, fallback
 
 def has_utf8_bom(path: Path) -> bool:
     try:
@@ -150,26 +218,114 @@ def has_utf8_bom(path: Path) -> bool:
 def _esc_ident(s: str) -> str:
     return '"' + s.replace('"', '""') + '"'
 
+_RE_NON_IDENT = re.compile(r"[^0-9a-zA-Z_]+")
+
 def _to_safe_schema(name: str) -> str:
-    s = re.sub(r"[^0-9a-zA-Z_]+", "_", name).strip("_") or "root"
+    s = _RE_NON_IDENT.sub("_", name).strip("_") or "root"
     if s[0].isdigit():
         s = "_" + s
     return s
 
+@lru_cache(maxsize=512)
+def _sheet_names_cached(path_str: str, mtime_ns: int) -> tuple[str, ...]:
+    """Lists workbook sheets without loading any cell data; keyed by mtime so edits re-read."""
+    p = Path(path_str)
+    if p.suffix.lower() == ".xlsx" and _openpyxl() is not None:
+        try:
+            wb = openpyxl.load_workbook(p, read_only=True, data_only=True, keep_links=False)
+            try:
+                return tuple(wb.sheetnames)
+            finally:
+                wb.close()
+        except Exception:
+            pass
+    if CalamineWorkbook is not None:
+        try:
+            return tuple(CalamineWorkbook.from_path(path_str).sheet_names)
+        except Exception:
+            pass
+    return tuple(pd.ExcelFile(p).sheet_names)
+
+def _excel_sheet_names(p: Path) -> tuple[str, ...]:
+    return _sheet_names_cached(str(p), p.stat().st_mtime_ns)
+
+def _read_excel_frame(p: Path, sheet):
+    """Loads one sheet as an Arrow table (fastexcel) or a DataFrame (pandas)."""
+    if fastexcel is not None:
+        try:
+            return fastexcel.read_excel(str(p)).load_sheet(sheet or 0).to_arrow()
+        except Exception:
+            pass
+    try:
+        return pd.read_excel(p, sheet_name=sheet or 0, engine="openpyxl")
+    except Exception:
+        return pd.read_excel(p, sheet_name=sheet or 0)
+
+def _read_csv_frame(p: Path, enc: str, delim: str | None):
+    """Lenient load for CSVs DuckDB rejects: pyarrow (bad rows skipped) when installed, else pandas."""
+    if pacsv is not None:
+        try:
+            return pacsv.read_csv(
+                p,
+                read_options=pacsv.ReadOptions(encoding=enc),
+                parse_options=pacsv.ParseOptions(delimiter=delim or ",", invalid_row_handler=lambda row: "skip"),
+            )
+        except Exception:
+            pass
+    try:
+        return pd.read_csv(p, sep=None, engine="python", encoding=enc, on_bad_lines="skip")
+    except Exception:
+        return pd.read_csv(p, sep=None, engine="python", encoding="utf-16", on_bad_lines="skip")
+
+def _write_csv_frame(df: pd.DataFrame, fp: str, progress=None, chunk: int = 50_000):
+    """UTF-8-with-BOM CSV export, written by pandas in row chunks (progress(rows_done))."""
+    with open(fp, "wb") as f:
+        f.write(codecs.BOM_UTF8)
+        for off in range(0, len(df), chunk):
+            df.iloc[off:off + chunk].to_csv(f, index=False, header=off == 0, encoding="utf-8")
+            if progress: progress(min(off + chunk, len(df)))
+
+def _write_excel_frame(df: pd.DataFrame, fp: str):
+    """xlsxwriter when installed, else openpyxl."""
+    # Not constant_memory: to_excel writes column by column, and that mode drops cells of already-flushed rows.
+    if xlsxwriter is not None:
+        writer = pd.ExcelWriter(fp, engine="xlsxwriter")
+    else:
+        writer = pd.ExcelWriter(fp, engine="openpyxl")
+    with writer as w:
+        df.to_excel(w, index=False, sheet_name="Result")
+
+def _scan_baks(root: Path):
+    """Yield (path, mtime) for every *.bak under root; scandir's DirEntry avoids extra stat calls."""
+    try:
+        it = os.scandir(root)
+    except OSError:
+        return
+    with it:
+        for e in it:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    yield from _scan_baks(e.path)
+                elif e.name.endswith(".bak"):
+                    yield Path(e.path), e.stat(follow_symlinks=False).st_mtime
+            except OSError:
+                pass
+
 class FileKind:
     CSV="csv"; TXT="txt"; EXCEL="excel"
 
 def iter_tables_in_path(db_path: Path):
     """Yield (display_name, file_path, kind, sheet) without duplicates."""
     seen = set()
-    for p in sorted(db_path.iterdir()):
-        if not p.is_file(): continue
-        ext = p.suffix.lower()
+    with os.scandir(db_path) as it:
+        entries = sorted((e for e in it if e.is_file()), key=lambda e: e.name)
+    for e in entries:
+        ext = os.path.splitext(e.name)[1].lower()
         if ext not in SUPPORTED_EXTS: continue
+        p = Path(e.path)
         if ext in {".xlsx", ".xls"}:
             try:
-                xls = pd.ExcelFile(p)
-                for sheet in xls.sheet_names:
+                for sheet in _excel_sheet_names(p):
                     disp = f"{p.stem}__{sheet}"
                     if disp in seen: continue
                     seen.add(disp); yield (disp, p, FileKind.EXCEL, sheet)
@@ -194,6 +350,9 @@ class NameResolver:
         self.disp2int = {}
         self.int2disp = {}
         self.used = set()
+        self._displays = {}
+        self._schema_regex = {}
+        self.esc = {}
 
     def _unique(self, schema, base):
         name, i = base, 2
@@ -202,19 +361,58 @@ class NameResolver:
         self.used.add((schema,name)); return name
 
     def register(self, schema, display_name):
-        base = re.sub(r"[^0-9a-zA-Z_]+", "_", display_name).strip("_") or "tbl"
+        base = _RE_NON_IDENT.sub("_", display_name).strip("_") or "tbl"
         if base[0].isdigit(): base = "_" + base
         internal = self._unique(schema, base)
         self.disp2int[(schema,display_name)] = internal
         self.int2disp[(schema,internal)] = display_name
+        self.esc[(schema,internal)] = f"{_esc_ident(schema)}.{_esc_ident(internal)}"
+        self._displays.setdefault(schema, []).append(display_name)
+        self._schema_regex.pop(schema, None)
         return internal
 
+    def drop_schema(self, schema):
+        self.used = {pair for pair in self.used if pair[0] != schema}
+        for k in list(self.disp2int.keys()):
+            if k[0] == schema:
+                del self.disp2int[k]
+        for k in list(self.int2disp.keys()):
+            if k[0] == schema:
+                del self.int2disp[k]
+                self.esc.pop(k, None)
+        self._displays.pop(schema, None)
+        self._schema_regex.pop(schema, None)
+
     def to_internal(self, schema, display_name):
         return self.disp2int.get((schema,display_name))
 
     def to_display(self, schema, internal):
         return self.int2disp.get((schema,internal))
 
+    def qualified(self, schema, internal):
+        """Escaped "schema"."internal"; precomputed for registered tables."""
+        return self.esc.get((schema,internal)) or f"{_esc_ident(schema)}.{_esc_ident(internal)}"
+
+    def _schema_pattern(self, schema):
+        """Compiled once per schema: one alternation over every display name (longest first)."""
+        cached = self._schema_regex.get(schema)
+        if cached is not None:
+            return cached
+        disps = sorted(set(self._displays.get(schema, ())), key=len, reverse=True)
+        lut = {}
+        for d in disps:
+            lut.setdefault(d.lower(), self.disp2int[(schema, d)])
+        pat = None
+        if disps:
+            alt = "|".join(map(re.escape, disps))
+            sch = re.escape(schema)
+            pat = re.compile(
+                rf'(?<![\w])(?:{sch}|"{sch}"|\[{sch}\])\s*\.\s*(?:"({alt})"|\[({alt})\]|({alt}))(?![\w])',
+                re.I
+            )
+        self._schema_regex[schema] = cached = (pat, lut)
+        return cached
+
     def rewrite_sql(self, sql: str, schema_tables: dict[str, list[str]]):
         """
         Replaces schema.display with schema.internal, supporting:
@@ -223,28 +421,63 @@ class NameResolver:
         - Case-insensitive matching
         """
         out = sql
-        for sch, disp_list in schema_tables.items():
-            for disp in sorted(disp_list, key=len, reverse=True):
-                internal = self.to_internal(sch, disp)
-                if not internal:
-                    continue
-                sch_pat = rf'(?:{re.escape(sch)}|"{re.escape(sch)}"|\[{re.escape(sch)}\])'
-                disp_pat = rf'(?:{re.escape(disp)}|"{re.escape(disp)}"|\[{re.escape(disp)}\])'
-                pat = rf'(?i)(?<![\w]){sch_pat}\s*\.\s*{disp_pat}(?![\w])'
-                out = re.sub(pat, f"{sch}.{internal}", out)
+        sql_lower = sql.lower()
+        for sch in schema_tables:
+            if sch.lower() not in sql_lower:
+                continue
+            pat, lut = self._schema_pattern(sch)
+            if pat is None:
+                continue
+            out = pat.sub(
+                lambda m, sch=sch, lut=lut: f"{sch}.{lut[(m.group(1) or m.group(2) or m.group(3)).lower()]}",
+                out
+            )
         return out
 
 
 class DuckCatalog:
     def __init__(self):
-        self.con = duckdb.connect(database=":memory:")
+        self._con = duckdb.connect(database=":memory:")
+        self._local = threading.local()  # .con: cursor bound by a worker thread (use_connection)
         self.registry = {}
         self.schemas  = {}
         self.names    = NameResolver()
-        self._excel_loaded = False
+        self._excel_loaded = None
+        self._frames   = {}
+        self._csv_cache = _load_json(CSV_CACHE_PATH, {})
+        self._csv_cache_dirty = False
+        self._parsed   = (None, None)
+        self.version   = 0               # bumped whenever registry changes; keys derived caches
+        self._schema_tables = (None, {})
+        self.backups: list[tuple[Path, float]] = []  # (.bak path, mtime) written this session
         self._re_dml   = re.compile(r"^\s*(INSERT|UPDATE|DELETE)\b", re.I|re.S)
         self._re_ctas  = re.compile(r"(?is)^\s*create\s+table\s+([A-Za-z_]\w*)\.([A-Za-z_]\w*)\s+as\s+(select\b.+)$")
         self._re_target= re.compile(r"(?i)\b(?:INTO|UPDATE|FROM)\s+([A-Za-z_]\w*)\.([A-Za-z_]\w*)")
+        self._re_select= re.compile(r"^\s*select\b", re.I)
+        self._re_limit = re.compile(r"\blimit\b", re.I)
+
+    @property
+    def con(self):
+        """The connection for the calling thread: its bound cursor, else the main connection."""
+        return getattr(self._local, "con", None) or self._con
+
+    def cursor(self):
+        """A cursor for a worker thread, with the registered fallback frames (cursors don't share them)."""
+        cur = self._con.cursor()
+        for tmp, frame in list(self._frames.values()):
+            cur.register(tmp, frame)
+        return cur
+
+    def use_connection(self, con):
+        """Route this thread's catalog calls through con (a cursor()); None restores the main connection."""
+        self._local.con = con
+
+    def _register_frame(self, schema, internal, frame):
+        tmp = f"tmp_{schema}_{internal}"
+        for con in {id(c): c for c in (self._con, self.con)}.values():
+            con.register(tmp, frame)
+        self._frames[(schema, internal)] = (tmp, frame)
+        return tmp
 
     def drop_schema(self, schema: str):
         schema = _to_safe_schema(schema)
@@ -252,23 +485,33 @@ class DuckCatalog:
             self.con.execute(f"DROP SCHEMA IF EXISTS {_esc_ident(schema)} CASCADE;")
         except Exception:
             pass
+        for k in [k for k in self._frames if k[0] == schema]:
+            try: self._con.unregister(self._frames.pop(k)[0])
+            except Exception: pass
         self.registry = {k: v for k, v in self.registry.items() if k[0] != schema}
         self.schemas.pop(schema, None)
-        self.names.used = {pair for pair in self.names.used if pair[0] != schema}
-        for k in list(self.names.disp2int.keys()):
-            if k[0] == schema:
-                del self.names.disp2int[k]
-        for k in list(self.names.int2disp.keys()):
-            if k[0] == schema:
-                del self.names.int2disp[k]
+        self.names.drop_schema(schema)
+        self.version += 1
 
     def reset(self):
-        try: self.con.close()
+        try: self._con.close()
         except Exception: pass
+        version, backups = self.version, self.backups
         self.__init__()
+        self.version, self.backups = version + 1, backups
+
+    def schema_tables(self) -> dict[str, list[str]]:
+        """{schema: [display names]} of registered tables, rebuilt only when the version changes."""
+        if self._schema_tables[0] != self.version:
+            tables = {}
+            for sch, internal in self.registry:
+                tables.setdefault(sch, []).append(self.names.to_display(sch, internal) or internal)
+            self._schema_tables = (self.version, tables)
+        return self._schema_tables[1]
 
     def _ensure_excel(self):
-        if self._excel_loaded: return
+        """Loads the excel extension once per connection, on the first Excel file attached."""
+        if self._excel_loaded is not None: return self._excel_loaded
         try: self.con.execute("INSTALL excel;")
         except Exception: pass
         try:
@@ -276,33 +519,162 @@ class DuckCatalog:
             self._excel_loaded = True
         except Exception:
             self._excel_loaded = False
+        return self._excel_loaded
+
+    def _csv_layout(self, fpath: Path, con=None) -> dict:
+        """
+        Returns delimiter/quote/skip/comment/column names for this version of the file.
+        Sniffed once and persisted keyed by (path, mtime, size), so later
+        attaches skip DuckDB's full-file type inference.
+        """
+        st = fpath.stat()
+        key = str(fpath)
+        hit = self._csv_cache.get(key)
+        if hit and hit.get("mtime") == st.st_mtime_ns and hit.get("size") == st.st_size and "skip" in hit:
+            return hit  # entries cached before skip/comment were kept get re-sniffed
+        delim, quote, escape, skip, comment, cols = (con or self.con).execute(
+            f"SELECT Delimiter, Quote, Escape, SkipRows, Comment, Columns FROM sniff_csv('{fpath.as_posix()}', HEADER=TRUE, SAMPLE_SIZE=-1);"
+        ).fetchone()
+        layout = {
+            "mtime": st.st_mtime_ns, "size": st.st_size,
+            "delim": delim,
+            "quote": quote if len(quote or "") == 1 else None,
+            "escape": escape if len(escape or "") == 1 else None,
+            "skip": skip or 0,
+            "comment": comment if len(comment or "") == 1 else None,
+            "columns": [c["name"] for c in cols],
+        }
+        self._csv_cache[key] = layout
+        self._csv_cache_dirty = True
+        return layout
+
+    def _csv_view_sql(self, src: str, layout: dict, filename: bool = False) -> str:
+        """src: a file path or a glob (posix form)."""
+        lit = lambda v: "'" + v.replace("'", "''") + "'"
+        opts = [f"DELIM={lit(layout['delim'])}", "HEADER=TRUE", "AUTO_DETECT=FALSE"]
+        if layout.get("quote"):  opts.append(f"QUOTE={lit(layout['quote'])}")
+        if layout.get("escape"): opts.append(f"ESCAPE={lit(layout['escape'])}")
+        if layout.get("skip"):   opts.append(f"SKIP={int(layout['skip'])}")
+        if layout.get("comment"): opts.append(f"COMMENT={lit(layout['comment'])}")
+        if filename: opts.append("FILENAME=TRUE")
+        cols = ", ".join(f"{lit(c)}: 'VARCHAR'" for c in layout["columns"])
+        opts.append(f"COLUMNS={{{cols}}}")
+        return f"SELECT * FROM read_csv({lit(src)}, {', '.join(opts)})"
+
+    @staticmethod
+    def _union_members(folder: Path, batch) -> set:
+        """
+        Internal names of the batch that can share one globbed '<folder>/*.csv' view:
+        the glob must match exactly these files and they must all have the same layout.
+        """
+        csvs = [(job, sn[2]) for job, sn in batch if job[1].suffix == ".csv"]
+        if len(csvs) < 2 or any(ch in folder.as_posix() for ch in "*?[{"):
+            return set()
+        keys = {(l["delim"], l.get("quote"), l.get("escape"), l.get("skip"), l.get("comment"), tuple(l["columns"]))
+                for _, l in csvs}
+        if len(keys) != 1 or "filename" in csvs[0][1]["columns"]:
+            return set()
+        with os.scandir(folder) as it:
+            on_disk = {e.name for e in it if e.is_file() and e.name.endswith(".csv")}
+        if on_disk != {job[1].name for job, _ in csvs}:
+            return set()
+        return {job[0] for job, _ in csvs}
+
+    def _sniff_one(self, fpath: Path, kind):
+        """Worker-thread part of attach: file sniffing only, no catalog writes."""
+        if kind not in (FileKind.CSV, FileKind.TXT):
+            return None, None, None
+        enc, delim = sniff_file(fpath)
+        try:
+            cur = self.con.cursor()
+            try:
+                layout = self._csv_layout(fpath, cur)
+            finally:
+                cur.close()
+        except Exception:
+            layout = None
+        return enc, delim, layout
 
-    def attach_folder(self, schema: str, folder: Path):
+    def attach_folder(self, schema: str, folder: Path) -> list[tuple[str, Path, str, str|None, str]]:
+        """
+        Registers every table of the folder under schema.
+        Returns (display, path, kind, sheet, internal) for each table that was registered.
+        """
         schema = _to_safe_schema(schema)
         self.schemas[schema] = folder
         self.con.execute(f"CREATE SCHEMA IF NOT EXISTS {_esc_ident(schema)};")
-    
-        for display, fpath, kind, sheet in iter_tables_in_path(folder):
-            internal = self.names.register(schema, display)
+        tables = list(iter_tables_in_path(folder))
+    
+        jobs = [(self.names.register(schema, display), fpath, kind, sheet) for display, fpath, kind, sheet in tables]
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+            sniffed = list(pool.map(lambda j: self._sniff_one(j[1], j[2]), jobs))
+
+        # Views over a known CSV layout don't touch the file at bind time, so they are created
+        # in one transaction. DuckDB aborts the whole transaction on any error, so a failure
+        # rolls back and those files go through the per-file fallbacks below instead.
+        batch = [(j, sn) for j, sn in zip(jobs, sniffed) if sn[2] is not None]
+        done = set()
+        if batch:
+            # Folders of same-shaped CSVs get one globbed read_csv (DuckDB reads the files in
+            # parallel); each table is then a filename-filtered view over it.
+            union = self._union_members(folder, batch)
+            union_ident = f"{_esc_ident(schema)}.__union"
+            try:
+                self.con.begin()
+                if union:
+                    layout = next(sn[2] for job, sn in batch if job[0] in union)
+                    self.con.execute(
+                        f"CREATE OR REPLACE VIEW {union_ident} AS "
+                        f"{self._csv_view_sql(folder.as_posix() + '/*.csv', layout, filename=True)};"
+                    )
+                for (internal, fpath, kind, sheet), (enc, sniffed_delim, layout) in batch:
+                    if internal in union:
+                        # Basenames: the glob's filename column need not spell the folder the way fpath does.
+                        name = fpath.name.replace("'", "''")
+                        body = (f"SELECT * EXCLUDE (filename) FROM {union_ident} "
+                                f"WHERE parse_filename(filename) = '{name}'")
+                    else:
+                        body = self._csv_view_sql(fpath.as_posix(), layout)
+                    self.con.execute(f"CREATE OR REPLACE VIEW {self.names.qualified(schema, internal)} AS {body};")
+                self.con.commit()
+                for (internal, fpath, kind, sheet), (enc, sniffed_delim, layout) in batch:
+                    self.registry[(schema, internal)] = RegMeta(fpath, kind, None, layout["delim"], enc)
+                    done.add(internal)
+            except Exception:
+                try: self.con.rollback()
+                except Exception: pass
+
+        for (internal, fpath, kind, sheet), (enc, sniffed_delim, layout) in zip(jobs, sniffed):
+            if internal in done:
+                continue
             try:
                 if kind in (FileKind.CSV, FileKind.TXT):
-                    enc = sniff_encoding(fpath)
                     try:
-                        self.con.execute(
-                            f"""
-                            CREATE OR REPLACE VIEW {_esc_ident(schema)}.{_esc_ident(internal)} AS
-                            SELECT * FROM read_csv_auto('{fpath.as_posix()}',
-                                HEADER=TRUE, SAMPLE_SIZE=-1, ALL_VARCHAR=TRUE
-                            );
-                            """
-                        )
-                        self.registry[(schema, internal)] = RegMeta(fpath, kind, None, None, enc)
+                        try:
+                            if layout is None:
+                                raise RuntimeError("no cached layout")
+                            self.con.execute(
+                                f"CREATE OR REPLACE VIEW {self.names.qualified(schema, internal)} AS "
+                                f"{self._csv_view_sql(fpath.as_posix(), layout)};"
+                            )
+                            delim = layout["delim"]
+                        except Exception:
+                            self.con.execute(
+                                f"""
+                                CREATE OR REPLACE VIEW {self.names.qualified(schema, internal)} AS
+                                SELECT * FROM read_csv_auto('{fpath.as_posix()}',
+                                    HEADER=TRUE, SAMPLE_SIZE=-1, ALL_VARCHAR=TRUE
+                                );
+                                """
+                            )
+                            delim = sniffed_delim
+                        self.registry[(schema, internal)] = RegMeta(fpath, kind, None, delim, enc)
                     except Exception:
                         try:
-                            delim = sniff_delimiter(fpath)
+                            delim = sniffed_delim
                             self.con.execute(
                                 f"""
-                                CREATE OR REPLACE VIEW {_esc_ident(schema)}.{_esc_ident(internal)} AS
+                                CREATE OR REPLACE VIEW {self.names.qualified(schema, internal)} AS
                                 SELECT * FROM read_csv('{fpath.as_posix()}',
                                     AUTO_DETECT=TRUE,
                                     HEADER=TRUE,
@@ -319,62 +691,49 @@ class DuckCatalog:
                             )
                             self.registry[(schema, internal)] = RegMeta(fpath, kind, None, delim, enc)
                         except Exception:
-                            try:
-                                df = pd.read_csv(
-                                    fpath, sep=None, engine="python",
-                                    encoding=enc, on_bad_lines="skip"
-                                )
-                            except Exception:
-                                df = pd.read_csv(
-                                    fpath, sep=None, engine="python",
-                                    encoding="utf-16", on_bad_lines="skip"
-                                )
-    
-                            tmp = f"tmp_{schema}_{internal}"
-                            self.con.register(tmp, df)
+                            tmp = self._register_frame(schema, internal, _read_csv_frame(fpath, enc, sniffed_delim))
                             self.con.execute(
                                 f"""
-                                CREATE OR REPLACE TABLE {_esc_ident(schema)}.{_esc_ident(internal)} AS
+                                CREATE OR REPLACE VIEW {self.names.qualified(schema, internal)} AS
                                 SELECT * FROM {_esc_ident(tmp)};
                                 """
                             )
-                            self.con.unregister(tmp)
                             self.registry[(schema, internal)] = RegMeta(fpath, kind, None, None, enc)
                 elif kind == FileKind.EXCEL:
                     try:
-                        try:
-                            self.con.execute("LOAD excel;")
-                        except Exception:
-                            pass
+                        self._ensure_excel()
                         sh = sheet or 0
                         self.con.execute(
                             f"""
-                            CREATE OR REPLACE VIEW {_esc_ident(schema)}.{_esc_ident(internal)} AS
+                            CREATE OR REPLACE VIEW {self.names.qualified(schema, internal)} AS
                             SELECT * FROM read_excel('{fpath.as_posix()}', sheet='{sh}');
                             """
                         )
                         self.registry[(schema, internal)] = RegMeta(fpath, kind, sheet, None, None)
                     except Exception:
-                        try:
-                            df = pd.read_excel(fpath, sheet_name=sheet or 0, engine="openpyxl")
-                        except Exception:
-                            df = pd.read_excel(fpath, sheet_name=sheet or 0)
-                        tmp = f"tmp_{schema}_{internal}"
-                        self.con.register(tmp, df)
+                        tmp = self._register_frame(schema, internal, _read_excel_frame(fpath, sheet))
                         self.con.execute(
                             f"""
-                            CREATE OR REPLACE TABLE {_esc_ident(schema)}.{_esc_ident(internal)} AS
+                            CREATE OR REPLACE VIEW {self.names.qualified(schema, internal)} AS
                             SELECT * FROM {_esc_ident(tmp)};
                             """
                         )
-                        self.con.unregister(tmp)
                         self.registry[(schema, internal)] = RegMeta(fpath, kind, sheet, None, None)
             except Exception as e:
                 print("[WARN] skip:", fpath, e)
+        if self._csv_cache_dirty:
+            _save_json(CSV_CACHE_PATH, self._csv_cache)
+            self._csv_cache_dirty = False
+        self.version += 1
+        return [
+            (display, fpath, kind, sheet, internal)
+            for (display, fpath, kind, sheet), (internal, *_) in zip(tables, jobs)
+            if (schema, internal) in self.registry
+        ]
 
     def describe(self, schema, internal) -> DataFrame:
         df = self.con.execute(
-            f"DESCRIBE {_esc_ident(schema)}.{_esc_ident(internal)};"
+            f"DESCRIBE {self.names.qualified(schema, internal)};"
         ).fetchdf()
         if "column_name" in df.columns:
             return df.rename(columns={"column_name": "colname"})
@@ -385,9 +744,19 @@ class DuckCatalog:
                 return df.rename(columns={c: "colname"})
         return df
 
+    def column_names(self, schema, internal) -> list[str]:
+        """Column names for autocomplete; [] if the table can't be described."""
+        try:
+            ddesc = self.describe(schema, internal)
+            field = "colname" if "colname" in ddesc.columns else ddesc.columns[0]
+            col = ddesc[field]
+            return col.tolist() if col.dtype == object else list(map(str, col.to_numpy()))
+        except Exception:
+            return []
+
     def preview(self, schema, table_internal, limit=100) -> DataFrame:
         return self.con.execute(
-            f"SELECT * FROM {_esc_ident(schema)}.{_esc_ident(table_internal)} LIMIT {limit};"
+            f"SELECT * FROM {self.names.qualified(schema, table_internal)} LIMIT {limit};"
         ).fetchdf()
 
     def _backup(self, path: Path):
@@ -395,10 +764,25 @@ class DuckCatalog:
             ts = datetime.now().strftime("%Y%m%d_%H%M%S")
             bak = path.with_suffix(path.suffix + f".{ts}.bak")
             shutil.copy2(path, bak)
+            self.backups.append((bak, bak.stat().st_mtime))
         except Exception:
             pass
 
+    def _stmt_kind(self, stmt: str) -> str | None:
+        """Statement type name from DuckDB's parser ("SELECT", "INSERT", ...); None if unparsable."""
+        if self._parsed[0] != stmt:
+            try:
+                parsed = self.con.extract_statements(stmt)
+                kind = parsed[0].type.name if len(parsed) == 1 else None
+            except Exception:
+                kind = None
+            self._parsed = (stmt, kind)
+        return self._parsed[1]
+
     def maybe_ctas(self, stmt: str) -> str | None:
+        kind = self._stmt_kind(stmt)
+        if kind is not None and kind != "CREATE":
+            return None
         m = self._re_ctas.match(stmt)
         if not m:
             return None
@@ -415,28 +799,64 @@ class DuckCatalog:
         self.attach_folder(schema, self.schemas[schema])
         return str(out)
 
+    @staticmethod
+    def _dml_refs(stmt: str) -> list[tuple[int, int, str, str]]:
+        """
+        (start, end, schema, table) for every INTO/UPDATE/FROM schema.table in stmt,
+        located with DuckDB's tokenizer so string literals, comments and "quoted"
+        identifiers are handled. Quotes are stripped from the returned names.
+        """
+        toks = duckdb.tokenize(stmt)
+        bounds = [pos for pos, _ in toks] + [len(stmt)]
+        text = [stmt[bounds[i]:bounds[i + 1]].rstrip() for i in range(len(toks))]
+        unq = lambda t: t[1:-1].replace('""', '"') if len(t) >= 2 and t[0] == t[-1] == '"' else t
+        is_name = lambda i: toks[i][1].name in ("identifier", "keyword")  # e.g. a table called "semi"
+        refs = []
+        for i in range(len(toks) - 3):
+            if (toks[i][1].name == "keyword" and text[i].upper() in ("INTO", "UPDATE", "FROM")
+                    and text[i + 2] == "." and is_name(i + 1) and is_name(i + 3)):
+                refs.append((bounds[i + 1], bounds[i + 3] + len(text[i + 3]), unq(text[i + 1]), unq(text[i + 3])))
+        return refs
+
     def maybe_write_back(self, stmt: str) -> bool:
-        if not self._re_dml.search(stmt or ""): return False
-        m = self._re_target.search(stmt)
-        if not m: return False
-        schema, table = m.group(1), m.group(2)
+        kind = self._stmt_kind(stmt or "")
+        if kind is None:
+            if not self._re_dml.search(stmt or ""): return False
+        elif kind not in ("INSERT", "UPDATE", "DELETE"): return False
+        try:
+            refs = self._dml_refs(stmt)
+        except Exception:
+            refs = None
+        if refs is not None:
+            if not refs: return False
+            schema, table = refs[0][2], refs[0][3]
+        else:
+            m = self._re_target.search(stmt)
+            if not m: return False
+            schema, table = m.group(1), m.group(2)
         meta = self.registry.get((schema,table))
         if not meta: return False
 
         self.con.execute("DROP TABLE IF EXISTS __edit_tmp__;")
         self.con.execute(
-            f"CREATE TEMP TABLE __edit_tmp__ AS SELECT * FROM {_esc_ident(schema)}.{_esc_ident(table)};"
+            f"CREATE TEMP TABLE __edit_tmp__ AS SELECT * FROM {self.names.qualified(schema, table)};"
         )
 
-        def _rep(mm):
-            frag = mm.group(0)
-            return re.sub(rf"\b{schema}\.{table}\b", "__edit_tmp__", frag, flags=re.I)
-
-        stmt2 = re.sub(r"(?i)\b(INTO|UPDATE|FROM)\s+[A-Za-z_]\w*\.[A-Za-z_]\w*", _rep, stmt)
+        if refs is not None:
+            parts, last = [], 0
+            for s0, e0, sch, tbl in refs:
+                if sch.lower() == schema.lower() and tbl.lower() == table.lower():
+                    parts.append(stmt[last:s0]); parts.append("__edit_tmp__"); last = e0
+            parts.append(stmt[last:])
+            stmt2 = "".join(parts)
+        else:
+            def _rep(mm):
+                frag = mm.group(0)
+                return re.sub(rf"\b{schema}\.{table}\b", "__edit_tmp__", frag, flags=re.I)
+            stmt2 = self._re_target.sub(_rep, stmt)
         self.con.execute(stmt2)
-        df = self.con.execute("SELECT * FROM __edit_tmp__;").fetchdf()
-        if "filename" in df.columns:
-            df.drop(columns=["filename"], inplace=True)
+        cols = [d[0] for d in self.con.execute("SELECT * FROM __edit_tmp__ LIMIT 0;").description]
+        src = "SELECT * EXCLUDE (filename) FROM __edit_tmp__" if "filename" in cols else "SELECT * FROM __edit_tmp__"
 
         self._backup(meta.path)
         try:
@@ -444,11 +864,17 @@ class DuckCatalog:
                 delim = meta.delimiter or sniff_delimiter(meta.path)
                 enc   = meta.encoding or "utf-8"
                 tmp = meta.path.with_suffix(meta.path.suffix + ".tmp")
-                df.to_csv(tmp, index=False, encoding=enc, sep=delim)
+                if enc == "utf-8":
+                    d, out = delim.replace("'", "''"), tmp.as_posix().replace("'", "''")
+                    self.con.execute(f"COPY ({src}) TO '{out}' (FORMAT CSV, HEADER, DELIMITER '{d}');")
+                else:
+                    # DuckDB's CSV writer is UTF-8 only; keep BOM/UTF-16 files in their encoding.
+                    self.con.execute(src).fetchdf().to_csv(tmp, index=False, encoding=enc, sep=delim)
                 os.replace(tmp, meta.path)
             else:
-                if openpyxl is None: raise RuntimeError("openpyxl needed for Excel write-back.")
+                if _openpyxl() is None: raise RuntimeError("openpyxl needed for Excel write-back.")
                 if meta.path.suffix.lower()==".xls": raise RuntimeError("Write .xls not supported, save as .xlsx.")
+                df = self.con.execute(src).fetchdf()
                 sheet = meta.sheet or "Sheet1"
                 with pd.ExcelWriter(meta.path, engine="openpyxl", mode="a", if_sheet_exists="replace") as w:
                     df.to_excel(w, index=False, sheet_name=sheet)
@@ -460,10 +886,103 @@ class DuckCatalog:
         return True
 
     def run_query_limited(self, sql: str, cap: int|None):
-        if cap and re.match(r"^\s*select\b", sql, re.I) and re.search(r"\blimit\b", sql, re.I) is None:
+        if not cap:
+            return self.con.execute(sql).fetchdf()
+        # Only a literal leading SELECT is wrapped: PRAGMA/DESCRIBE/SUMMARIZE/FROM-first also parse as SELECT.
+        if self._re_select.match(sql) and self._re_limit.search(sql) is None:
             sql = f"SELECT * FROM ({sql}) __t LIMIT {cap}"
         return self.con.execute(sql).fetchdf()
 
+# Tcl lambda that inserts a whole batch of rows into a Treeview in one Python→Tcl call.
+_TCL_INSERT_ROWS = (
+    "{w rows start idx} {foreach r $rows {"
+    "$w insert {} $idx -id $start -values $r; incr start; if {$idx ne {end}} {incr idx}}}"
+)
+
+def _tree_insert_rows(tree: ttk.Treeview, rows, start: int = 0, index="end", chunk: int = 5000):
+    """rows: sequence of tuples of str; iids are start, start+1, … placed at index (or "end")."""
+    for off in range(0, len(rows), chunk):
+        at = index if index == "end" else index + off
+        tree.tk.call("apply", _TCL_INSERT_ROWS, tree._w, tuple(rows[off:off + chunk]), start + off, at)
+
+# Syntax highlighting patterns (compiled once, shared by every editor tab).
+# One alternation, tried left to right at each position: comments and literals swallow what they contain.
+_RE_HL = re.compile(
+    r"(?P<com>--[^\n]*)|(?P<str>'(?:''|[^'])*(?:'|\Z))|(?P<num>\b\d+(?:\.\d+)?\b)"
+    r"|(?P<kw>\b(?:SELECT|FROM|WHERE|GROUP|BY|ORDER|LIMIT|OFFSET|JOIN|LEFT|RIGHT|FULL|OUTER|INNER|ON|AND|OR|NOT|IN|IS|NULL|AS|CASE|WHEN|THEN|ELSE|END|WITH|UNION|ALL|INSERT|INTO|VALUES|UPDATE|SET|DELETE|CREATE|TABLE|VIEW|SCHEMA|DROP|DESCRIBE|EXPLAIN)\b)"
+    r"|(?P<fn>\b(?:COUNT|SUM|AVG|MIN|MAX|COALESCE|ROUND|CAST|DATE|YEAR|MONTH|DAY|LOWER|UPPER|LENGTH|SUBSTRING|REGEXP_MATCHES)\b)",
+    re.I,
+)
+_RE_LINE_COMMENT = re.compile(r"^\s*--\s?")
+_HL_TAGS = ("kw", "fn", "str", "com", "num")
+
+# Same idea for labelled tree nodes: items are (text, values) pairs, ids are left to Tk.
+_TCL_INSERT_NODES = "{w parent items} {foreach it $items {$w insert $parent end -text [lindex $it 0] -values [lindex $it 1]}}"
+
+def _tree_insert_nodes(tree: ttk.Treeview, parent: str, items):
+    if items:
+        tree.tk.call("apply", _TCL_INSERT_NODES, tree._w, parent, tuple(items))
+
+# Script splitting: literals, comments and backslash escapes are consumed whole so ; / GO inside them never match.
+_RE_SQL_SPLIT = re.compile(
+    r"""(?P<esc>\\[^;])|(?P<lit>'(?:\\.|[^'\\])*'?|"(?:\\.|[^"\\])*"?)|(?P<com>--[^\n]*|/\*.*?(?:\*/|\Z))"""
+    r"""|(?P<semi>;)|(?P<go>^[ \t]*GO[ \t]*(?:--[^\n]*)?$)""",
+    re.M | re.S,
+)
+
+@lru_cache(maxsize=4)
+def _split_sql_spans(sql: str) -> tuple[tuple[int, int, str], ...]:
+    """(start, end, stmt) per non-empty statement, end including its ; or GO; cached on the text."""
+    spans, start = [], 0
+    for m in _RE_SQL_SPLIT.finditer(sql):
+        if m.lastgroup in ("semi", "go"):
+            part = sql[start:m.start()].strip()
+            if part: spans.append((start, m.end(), part))
+            start = m.end()
+    part = sql[start:].strip()
+    if part: spans.append((start, len(sql), part))
+    return tuple(spans)
+
+@lru_cache(maxsize=4)
+def _line_starts(text: str) -> list[int]:
+    """Offset of the first char of each line (index 0 = line 1), cached on the text."""
+    return [0, *accumulate(len(ln) + 1 for ln in text.split("\n"))]
+
+def _tree_clear(tree: ttk.Treeview):
+    """Deletes all top-level items in one Tcl evaluation; the id list never crosses into Python."""
+    tree.tk.eval(f"{tree._w} delete [{tree._w} children {{}}]")
+
+def _line_ends_in_string(line: str, in_str: bool) -> bool:
+    """Lexer state carried across lines: does a '…' literal remain open at the end of `line`?"""
+    i = 0
+    while True:
+        if in_str:
+            j = line.find("'", i)
+            if j < 0: return True
+            i, in_str = j + 1, False
+        else:
+            j = line.find("'", i); c = line.find("--", i)
+            if j < 0 or 0 <= c < j: return False
+            i, in_str = j + 1, True
+
+def _offset_indexer(text: str, first_line: int = 1):
+    """offset in `text` (which starts at column 0 of first_line) -> Tk "line.col" index, via one line-start table."""
+    starts = [0, *accumulate(len(l) + 1 for l in text.split("\n"))]
+    def idx(off: int) -> str:
+        b = bisect_right(starts, off) - 1
+        return f"{first_line + b}.{off - starts[b]}"
+    return idx
+
+class _SQLText(tk.Text):
+    """tk.Text that reports where programmatic insert/delete calls start (typing is reported by bindings)."""
+    on_change = None
+    def insert(self, index, chars, *args):
+        if self.on_change: self.on_change(index)
+        return super().insert(index, chars, *args)
+    def delete(self, index1, index2=None):
+        if self.on_change: self.on_change(index1)
+        return super().delete(index1, index2)
+
 SQL_FONT = ("Consolas", 11) if sys.platform.startswith("win") else ("Menlo", 12)
 class EditorTab(ttk.Frame):
     """Independent editor tab: Text + line numbers"""
@@ -472,12 +991,31 @@ class EditorTab(ttk.Frame):
         super().__init__(master)
         self.path: Path|None = None
         self.dirty = False
+        self._hl_after = None
+        self._hl_states = [False]  # [i]: line i+1 starts inside a string literal
+        self._hl_valid = 1         # states for lines 1.._hl_valid are up to date
+        self._hl_view = None       # (first, last) viewport tagged since the last edit
+        self.edits = 0             # bumped on every (possible) edit; keys per-buffer caches
+        self._aliases = (-1, {})   # (edits, FROM/JOIN aliases of the buffer)
+        self._app = self.winfo_toplevel()
 
         wrap = ttk.Frame(self); wrap.pack(fill=tk.BOTH, expand=True)
         
-        self.linenum = tk.Canvas(wrap, width=44, background="#f5f5f5", highlightthickness=0)
+        self.linenum = tk.Text(wrap, width=4, padx=4, background="#f5f5f5", foreground="#999",
+                               borderwidth=0, highlightthickness=0, takefocus=0, cursor="arrow",
+                               wrap="none", font=SQL_FONT, state="disabled")
+        self._linenum_count = 0
+        self._linenum_after = None
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.linenum.bind(seq, lambda e: "break")
         
-        self.text = tk.Text(wrap, height=10, wrap="none", undo=True, font=SQL_FONT)
+        self.text = _SQLText(wrap, height=10, wrap="none", undo=True, font=SQL_FONT)
+        self.text.on_change = self._hl_touch
+        self.text.bind("<KeyPress>", self._on_keypress, add=True)
+        self.text.bind("<<Paste>>", self._on_keypress, add=True)
+        self.text.bind("<<PasteSelection>>", lambda e: self._hl_touch(f"@{e.x},{e.y}"), add=True)
+        for seq in ("<<Undo>>", "<<Redo>>"):
+            self.text.bind(seq, lambda e: self._hl_touch("1.0"), add=True)
         q_vsb = ttk.Scrollbar(wrap, orient="vertical", command=self.text.yview)
         q_hsb = ttk.Scrollbar(wrap, orient="horizontal", command=self.text.xview)
         
@@ -490,7 +1028,7 @@ class EditorTab(ttk.Frame):
         q_hsb.grid(row=1, column=1, sticky="ew")
         
         self.text.configure(
-            yscrollcommand=lambda *a: (q_vsb.set(*a), self.update_linenum()),
+            yscrollcommand=lambda *a: (q_vsb.set(*a), self.schedule_linenum(), self._app._schedule_highlight(self)),
             xscrollcommand=q_hsb.set
         )
 
@@ -500,12 +1038,58 @@ class EditorTab(ttk.Frame):
     def set_dirty(self, v: bool):
         self.dirty = v
 
+    def _on_modified(self, event=None):
+        self._app._on_text_modified_tab(self)
+
+    def _hl_touch(self, index="insert"):
+        """An edit at `index` may change the string state of every following line."""
+        try: line = int(self.text.index(index).split(".")[0])
+        except tk.TclError: line = 1
+        self._hl_valid = min(self._hl_valid, max(1, line - 1))
+        self._hl_view = None
+        self.edits += 1
+
+    def _on_keypress(self, event=None):
+        # Widget bindings run before the Text class bindings, so this sees the pre-edit cursor/selection.
+        self._hl_touch("sel.first" if self.text.tag_ranges("sel") else "insert")
+
+    def in_string_at(self, line: int) -> bool:
+        """Lexer state at the start of `line`, recomputed only from the first edited line onwards."""
+        st, v = self._hl_states, self._hl_valid
+        if v < line:
+            del st[v:]
+            state = st[v - 1]
+            for ln in self.text.get(f"{v}.0", f"{line}.0").split("\n")[:line - v]:
+                state = _line_ends_in_string(ln, state); st.append(state)
+            self._hl_valid = line
+        return st[line - 1]
+
+    def _on_keyrelease(self, event=None):
+        self._app._schedule_highlight(self)
+        self.schedule_linenum()
+
+    def schedule_linenum(self):
+        """Coalesce a burst of scroll/key events into one gutter update once Tk is idle."""
+        if self._linenum_after is None:
+            self._linenum_after = self.after_idle(self.update_linenum)
+
     def update_linenum(self):
-        self.linenum.delete("all")
-        lines = self.text.get("1.0", tk.END).count("\n") + 1
-        for i in range(1, lines+1):
-            y = self.text.dlineinfo(f"{i}.0")
-            if y: self.linenum.create_text(2, y[1], anchor="nw", text=str(i), fill="#999")
+        """Gutter only gains/loses the changed tail of numbers; otherwise it just follows the scroll."""
+        if self._linenum_after is not None:
+            self.after_cancel(self._linenum_after); self._linenum_after = None
+        lines, old = int(self.text.index("end-1c").split(".")[0]), self._linenum_count
+        if lines != old:
+            self._linenum_count = lines
+            g = self.linenum
+            g.configure(state="normal")
+            if len(str(lines)) != len(str(old)):
+                g.configure(width=max(4, len(str(lines)) + 1))
+            if lines > old:
+                g.insert("end-1c", ("\n" if old else "") + "\n".join(map(str, range(old + 1, lines + 1))))
+            else:
+                g.delete(f"{lines}.end", "end-1c")
+            g.configure(state="disabled")
+        self.linenum.yview_moveto(self.text.yview()[0])
 
 
 class App(tk.Tk):
@@ -519,6 +1103,7 @@ class App(tk.Tk):
         self._server_alias: dict[str, str] = {}
         self._schemas_by_server: dict[str, list[str]] = {}
         self._server_node_by_path: dict[str, str] = {}
+        self._ctx_menus: dict[str, tk.Menu] = {}
 
         self.catalog = DuckCatalog()
         self.current_sql_path: Path | None = None
@@ -530,7 +1115,12 @@ class App(tk.Tk):
         self._last_clicked_column_index = 0
 
         self._dark = bool(load_settings().get("dark", False))
+        self._hl_enabled = tk.BooleanVar(self, value=bool(load_settings().get("highlight", True)))
         self._catalog_cols_cache = {}
+        self._ac_catalog = (None, None)  # (catalog.version, _collect_catalog result)
+        self._ac_last = None             # ((parent, catalog.version, aliases), items) of the last popup
+        self._query_cancel: threading.Event | None = None  # set while a script runs on the worker thread
+        self._query_con = None  # that script's catalog cursor, for Stop
 
         self._build_menubar()
         self._build_toolbar()
@@ -550,6 +1140,7 @@ class App(tk.Tk):
         return None, None
 
     def _disconnect_by_path(self, path: Path):
+        if self._script_running(): return
         spath = str(path)
         alias = self._server_alias.pop(spath, None)
         schemas = self._schemas_by_server.pop(alias, []) if alias else []
@@ -574,6 +1165,7 @@ class App(tk.Tk):
             self._disconnect_by_path(path)
 
     def disconnect_all_servers(self):
+        if self._script_running(): return
         if not self.servers:
             self.status_var.set("No folders connected.")
             return
@@ -581,8 +1173,8 @@ class App(tk.Tk):
         self._server_alias.clear()
         self._schemas_by_server.clear()
         self.catalog.reset()
-        self.tree.delete(*self.tree.get_children())
-        self._catalog_cols_cache.clear()
+        _tree_clear(self.tree)
+        self._catalog_cols_cache = {}
         for b in (self.btn_refresh, self.btn_csv, self.btn_xlsx, self.btn_json,
                   self.btn_copy, self.btn_prof, self.btn_run, self.btn_run_current, self.btn_undo):
             b.config(state=tk.DISABLED)
@@ -599,6 +1191,7 @@ class App(tk.Tk):
         self.status_var.set(toast)
 
     def _add_server(self, folder: Path):
+        if self._script_running(): return
         alias = f"s{self._srv_seq}"; self._srv_seq += 1
         self.servers.append(folder)
         self._server_alias[str(folder)] = alias
@@ -632,17 +1225,34 @@ class App(tk.Tk):
                 text=str(display_name), open=False,
                 values=("database", schema_name, str(db_path))
             )
-            self.catalog.attach_folder(schema_name, db_path)
+            registered = self.catalog.attach_folder(schema_name, db_path)
             self._schemas_by_server[alias].append(schema_name)
-            added = set()
-            for display_name_tbl, fpath, kind, sheet in iter_tables_in_path(db_path):
-                if display_name_tbl in added: 
-                    continue
-                added.add(display_name_tbl)
-                internal = self.catalog.names.to_internal(schema_name, display_name_tbl)
-                ident = f"{schema_name}.{internal}"
-                title = display_name_tbl if not (kind == FileKind.EXCEL and sheet) else f"{display_name_tbl} (excel)"
-                self.tree.insert(db_node, "end", text=title, values=(ident,))
+            _tree_insert_nodes(self.tree, db_node, [
+                (display_name_tbl if not (kind == FileKind.EXCEL and sheet) else f"{display_name_tbl} (excel)",
+                 (f"{schema_name}.{internal}",))
+                for display_name_tbl, fpath, kind, sheet, internal in registered
+            ])
+        self._prefetch_columns([s for s, _, _ in dbs])
+
+    def _prefetch_columns(self, schemas):
+        """DESCRIBE the tables of `schemas` off the Tk thread so the first autocomplete doesn't stall on it."""
+        cache, names = self._catalog_cols_cache, self.catalog.names
+        todo = [(sch, internal, f"{sch}.{names.to_display(sch, internal) or internal}")
+                for sch, internal in self.catalog.registry if sch in schemas]
+        todo = [t for t in todo if t[2] not in cache]
+        if not todo: return
+        catalog = self.catalog
+
+        def work(_):
+            cur = catalog.cursor()
+            catalog.use_connection(cur)
+            try:
+                return {full: catalog.column_names(sch, internal) for sch, internal, full in todo}
+            finally:
+                catalog.use_connection(None)
+                cur.close()
+
+        self._run_in_background(work, lambda cols: cache.update({k: v for k, v in cols.items() if v and k not in cache}), "Catalog")
 
     def _get_selected_server_path(self) -> Path | None:
         """
@@ -708,6 +1318,7 @@ class App(tk.Tk):
     
         m_view = tk.Menu(self.menubar, tearoff=False)
         m_view.add_command(label="Toggle Dark Mode", command=self._toggle_dark)
+        m_view.add_checkbutton(label="Syntax Highlighting", variable=self._hl_enabled, command=self._toggle_highlighting)
         self.menubar.add_cascade(label="View", menu=m_view)
     
         m_help = tk.Menu(self.menubar, tearoff=False)
@@ -757,8 +1368,6 @@ class App(tk.Tk):
     
         ttk.Label(tb, textvariable=self.status_var, anchor="e").pack(side=tk.RIGHT, padx=8)
     
-        self._add_tip(self.btn_connect, "Select a folder and treat it as a Server to load files as tables", "Connect to a folder")
-        self._add_tip(self.btn_refresh, "Reload the catalog (re-scan files)", "Refresh catalog")
         self._add_tip(self.btn_export_csv, "Export the latest result to CSV (UTF-8-SIG)", "Export CSV")
         self._add_tip(self.btn_export_xlsx, "Export the latest result to Excel (requires openpyxl)", "Export Excel")
         self._add_tip(self.btn_export_json, "Export the latest result to JSON (records)", "Export JSON")
@@ -792,6 +1401,7 @@ class App(tk.Tk):
         edbar = ttk.Frame(ed_host); edbar.pack(side=tk.TOP, fill=tk.X)
         self.btn_run = ttk.Button(edbar, text="Run (F5)", command=self.run_query, state=tk.DISABLED); self.btn_run.pack(side=tk.LEFT, padx=6, pady=4)
         self.btn_run_current = ttk.Button(edbar, text="Run Current (Ctrl+Enter)", command=self.run_current_stmt, state=tk.DISABLED); self.btn_run_current.pack(side=tk.LEFT, padx=6)
+        self.btn_stop = ttk.Button(edbar, text="Stop", command=self.cancel_query, state=tk.DISABLED); self.btn_stop.pack(side=tk.LEFT)
         self.btn_clear = ttk.Button(edbar, text="Clear", command=self.clear_query); self.btn_clear.pack(side=tk.LEFT)
         self.btn_examples = ttk.Button(edbar, text="Examples", command=self.insert_examples); self.btn_examples.pack(side=tk.LEFT, padx=6)
         self.btn_comment = ttk.Button(edbar, text="Comment/Uncomment (Ctrl+/)", command=self.toggle_comment); self.btn_comment.pack(side=tk.LEFT, padx=6)
@@ -799,6 +1409,7 @@ class App(tk.Tk):
     
         self._add_tip(self.btn_run, "Run the entire script (supports ; and GO). Respects Safe Mode", "Run script")
         self._add_tip(self.btn_run_current, "Execute only the current statement at the cursor", "Run current statement")
+        self._add_tip(self.btn_stop, "Interrupt the running query", "Stop")
         self._add_tip(self.btn_clear, "Clear the editor content", "Clear editor")
         self._add_tip(self.btn_examples, "Insert ready-made examples", "Insert examples")
         self._add_tip(self.btn_comment, "Comment/Uncomment", "Toggle comment")
@@ -834,9 +1445,9 @@ class App(tk.Tk):
         tab.text.insert("1.0", initial_text)
         tab.text.edit_modified(False)
     
-        tab.text.bind("<<Modified>>",        lambda e, t=tab: self._on_text_modified_tab(t))
-        tab.text.bind("<KeyRelease>",        lambda e, t=tab: (self._apply_sql_highlighting(t), t.update_linenum()))
-        tab.text.bind("<ButtonRelease>",     lambda e, t=tab: (self._apply_sql_highlighting(t), t.update_linenum()))
+        tab.text.bind("<<Modified>>",        tab._on_modified)
+        tab.text.bind("<KeyRelease>",        tab._on_keyrelease)
+        tab.text.bind("<ButtonRelease>",     tab._on_keyrelease)
     
         self._init_sql_highlighting(tab)
     
@@ -846,13 +1457,7 @@ class App(tk.Tk):
         self._set_active_editor(tab)
     
         if hasattr(self, "_ac"):
-            tab.text.bind("<KeyRelease-period>", lambda e: _ac_trigger(self), add=True)
-            tab.text.bind("<Up>",     lambda e: (self._ac.list.event_generate("<Up>"),     "break")[1] if self._ac.is_visible() else None, add=True)
-            tab.text.bind("<Down>",   lambda e: (self._ac.list.event_generate("<Down>"),   "break")[1] if self._ac.is_visible() else None, add=True)
-            tab.text.bind("<Return>", lambda e: (self._ac.list.event_generate("<Return>"), "break")[1] if self._ac.is_visible() else None, add=True)
-            tab.text.bind("<Tab>",    lambda e: (self._ac.list.event_generate("<Tab>"),    "break")[1] if self._ac.is_visible() else None, add=True)
-            tab.text.bind("<Button-1>", lambda e: self._ac.hide(), add=True)
-            tab.text.bind("<Key>",      lambda e: self._ac.hide(), add=True)
+            self._ac.bind_editor(tab.text)
     
         self.btn_run.config(state=tk.NORMAL)
         self.btn_run_current.config(state=tk.NORMAL)
@@ -872,6 +1477,12 @@ class App(tk.Tk):
                 self.file_save()
         self.ed_nb.forget(cur)
         self._editor_tabs.pop(cur, None)
+        if tab:
+            if tab._hl_after: self.after_cancel(tab._hl_after)
+            if tab._linenum_after: tab.after_cancel(tab._linenum_after)
+            for seq in tab.text.bind():
+                tab.text.unbind(seq)
+            tab.destroy()
     
         if not self.ed_nb.tabs():
             self._new_editor_tab()
@@ -920,6 +1531,7 @@ class App(tk.Tk):
         st = load_settings()
         st["geometry"] = self.geometry()
         st["dark"] = self._dark
+        st["highlight"] = self._hl_enabled.get()
         save_settings(st)
         self.destroy()
 
@@ -973,6 +1585,7 @@ class App(tk.Tk):
         self._add_server(path)
 
     def choose_server(self):
+        if self._script_running(): return
         p = filedialog.askdirectory(title="Choose Folder (Server)")
         if not p:
             return
@@ -1009,7 +1622,7 @@ class App(tk.Tk):
             self.status_var.set("Database already connected.")
 
     def refresh_catalog(self):
-        if not self.servers:
+        if not self.servers or self._script_running():
             return
         for b in (self.btn_refresh, self.btn_csv, self.btn_xlsx, self.btn_json,
                   self.btn_copy, self.btn_prof, self.btn_run, self.btn_run_current, self.btn_undo):
@@ -1017,8 +1630,8 @@ class App(tk.Tk):
         self._result_close_all()
         self.msgbox.delete("1.0", tk.END)
         self.catalog.reset()
-        self._catalog_cols_cache.clear()
-        self.tree.delete(*self.tree.get_children())
+        self._catalog_cols_cache = {}  # a new dict, so in-flight prefetches land in the old one
+        _tree_clear(self.tree)
         self._server_node_by_path.clear()
         for srv in self.servers:
             alias = self._server_alias.get(str(srv))
@@ -1037,6 +1650,7 @@ class App(tk.Tk):
         self.status_var.set("Ready.")
 
     def on_tree_double(self, event):
+        if self._script_running(): return
         node = self.tree.focus()
         vals = self.tree.item(node, "values") if node else ()
         if not vals: return
@@ -1052,13 +1666,14 @@ class App(tk.Tk):
             messagebox.showerror("Preview Error", str(e))
 
     def on_tree_context(self, event):
+        if self._script_running(): return
         node = self.tree.identify_row(event.y)
         if not node:
             return
         self.tree.selection_set(node)
         vals = self.tree.item(node, "values") or ()
         kind = vals[0] if len(vals) >= 1 else ""
-        menu = tk.Menu(self, tearoff=False)
+        menu = self._context_menu("tree")
         if kind in {"server", "database"}:
             schema_name = vals[1] if (kind == "database" and len(vals) > 1) else ""
             folder_path = (
@@ -1066,41 +1681,42 @@ class App(tk.Tk):
                 else (vals[1] if (kind == "server" and len(vals) > 1) else self.tree.item(node, "text"))
             )
             if schema_name:
-                menu.add_command(
-                    label="Copy Schema Name",
-                    command=lambda s=schema_name: self._copy_to_clip(s, "Schema copied")
-                )
+                menu.add_command(label="Copy Schema Name", command=partial(self._copy_to_clip, schema_name, "Schema copied"))
             if folder_path:
-                menu.add_command(
-                    label="Open Folder",
-                    command=lambda p=folder_path: self._open_path(p)
-                )
-                menu.add_command(
-                    label="Disconnect",
-                    command=lambda p=Path(folder_path): self._disconnect_by_path(p)
-                )
+                menu.add_command(label="Open Folder", command=partial(self._open_path, folder_path))
+                menu.add_command(label="Disconnect", command=partial(self._disconnect_by_path, Path(folder_path)))
             if schema_name:
                 menu.add_separator()
-                def _insert_ctas_template():
-                    tmpl = (
-                        "\n-- CTAS into this schema (creates my_table.csv under this folder)\n"
-                        f'CREATE TABLE {schema_name}."my_table" AS\n'
-                        "SELECT 1 AS id, 'ok' AS note;\n"
-                    )
-                    self.editor.insert(tk.END, tmpl)
-                    self._apply_sql_highlighting()
-                menu.add_command(label="Insert CTAS template here", command=_insert_ctas_template)
+                menu.add_command(label="Insert CTAS template here", command=partial(self._insert_ctas_template, schema_name))
             menu.post(event.x_root, event.y_root)
             return
         ident = vals[0] if vals else ""
         if not ident or "." not in ident:
             return
         schema, table = ident.split(".", 1)
-        menu.add_command(label="Preview Top 100", command=lambda s=schema, t=table: self._ctx_preview(s, t))
-        menu.add_command(label="Describe",        command=lambda s=schema, t=table: self._ctx_describe(s, t))
-        menu.add_command(label="Profile",         command=lambda s=schema, t=table: self.profile_dialog(f"{s}.{t}"))
+        menu.add_command(label="Preview Top 100", command=partial(self._ctx_preview, schema, table))
+        menu.add_command(label="Describe",        command=partial(self._ctx_describe, schema, table))
+        menu.add_command(label="Profile",         command=partial(self.profile_dialog, f"{schema}.{table}"))
         menu.post(event.x_root, event.y_root)
 
+    def _context_menu(self, key: str) -> tk.Menu:
+        """One reusable popup per context; Menu.delete also frees the Tcl commands of the old entries."""
+        menu = self._ctx_menus.get(key)
+        if menu is None:
+            menu = self._ctx_menus[key] = tk.Menu(self, tearoff=False)
+        else:
+            menu.delete(0, tk.END)
+        return menu
+
+    def _insert_ctas_template(self, schema_name: str):
+        tmpl = (
+            "\n-- CTAS into this schema (creates my_table.csv under this folder)\n"
+            f'CREATE TABLE {schema_name}."my_table" AS\n'
+            "SELECT 1 AS id, 'ok' AS note;\n"
+        )
+        self.editor.insert(tk.END, tmpl)
+        self._apply_sql_highlighting()
+
     def _ctx_preview(self, schema, table):
         try:
             df = self.catalog.preview(schema, table, limit=100)
@@ -1118,61 +1734,163 @@ class App(tk.Tk):
             messagebox.showerror("Describe Error", str(e))
 
     def _normalize_for_grid(self, df: pd.DataFrame) -> pd.DataFrame:
-        out = df.copy()
-        for c in out.columns:
-            s = out[c]
+        """Display form of df: datetimes formatted, NaN/NaT blanked. Built per dtype group, df is not copied."""
+        kinds = {"dt": [], "td": [], "obj": []}
+        for i, t in enumerate(df.dtypes):
+            if pd.api.types.is_datetime64_any_dtype(t): kinds["dt"].append(i)
+            elif pd.api.types.is_timedelta64_dtype(t):  kinds["td"].append(i)
+            else:                                       kinds["obj"].append(i)
+        cols = {}
+        for kind, pos in kinds.items():
+            if not pos: continue
+            block = df.iloc[:, pos]; block.columns = pos
             try:
-                if pd.api.types.is_datetime64_any_dtype(s) or pd.api.types.is_datetime64_dtype(s):
-                    out[c] = pd.to_datetime(s, errors="coerce").dt.strftime("%Y-%m-%d %H:%M:%S")
-                    out.loc[pd.isna(s), c] = ""
-                elif pd.api.types.is_timedelta64_dtype(s):
-                    out[c] = s.astype("string").fillna("")
+                if kind == "dt":
+                    block = block.apply(lambda s: s.dt.strftime("%Y-%m-%d %H:%M:%S")).astype(object).where(block.notna(), "")
+                elif kind == "td":
+                    block = block.astype("string").fillna("").astype(object)
                 else:
-                    out[c] = s.astype(object)
-                    out.loc[pd.isna(s), c] = ""
+                    block = block.astype(object).where(block.notna(), "")
             except Exception:
-                out[c] = s.astype(object).where(~pd.isna(s), "")
+                block = block.astype(object).where(block.notna(), "")
+            cols.update(block.items())
+        out = pd.DataFrame({i: cols[i] for i in range(df.shape[1])}, index=df.index)
+        out.columns = df.columns
         return out
     
-    def _apply_result_dataframe_to_grid(self, tree: ttk.Treeview, df: pd.DataFrame, state: dict):
-        disp = self._normalize_for_grid(df)
-        disp_display = disp.copy()
-        disp_display.insert(0, "#", [i for i in range(1, len(disp_display) + 1)])
-    
-        tree.delete(*tree.get_children())
-        cols_display = ["#"] + [str(c) for c in disp.columns]
-        tree["columns"] = cols_display
-    
-        def _mk_sort(colname):
-            return lambda c=colname: self._result_sort_by(c)
-    
-        for c in cols_display:
-            if c == "#":
-                tree.heading(c, text=c, anchor="w")
-                tree.column(c, width=60, anchor="w", stretch=False)
-                continue
-            tree.heading(c, text=c, anchor="w", command=_mk_sort(c))
+    @staticmethod
+    def _grid_widths(disp: pd.DataFrame) -> list:
+        """Pixel width per data column from the p90 cell length of ~1000 evenly spaced rows."""
+        sample = disp.iloc[::max(1, len(disp) // 1000)]
+        widths = []
+        for i, c in enumerate(disp.columns):
             try:
-                sample_len = int(disp[c].astype(str).map(len).quantile(0.90)) + 2
+                sample_len = int(sample.iloc[:, i].astype(str).str.len().quantile(0.90)) + 2
             except Exception:
-                sample_len = max(12, len(c) + 2)
-            width_px = max(120, min(600, sample_len * 8))
+                sample_len = max(12, len(str(c)) + 2)
+            widths.append(max(120, min(600, sample_len * 8)))
+        return widths
+
+    def _setup_grid_columns(self, tree: ttk.Treeview, cols_display: list, widths: list):
+        tree["columns"] = cols_display
+        tree.heading("#", text="#", anchor="w")
+        tree.column("#", width=60, anchor="w", stretch=False)
+        for c, width_px in zip(cols_display[1:], widths):
+            tree.heading(c, text=c, anchor="w", command=partial(self._result_sort_by, c))
             tree.column(c, width=width_px, anchor="w", stretch=False)
+
+    # Results with more cells than this are formatted on a worker thread.
+    _GRID_ASYNC_CELLS = 200_000
+
+    def _prepare_grid(self, df: pd.DataFrame):
+        """Thread-safe part of showing a result: no Tk calls."""
+        disp = self._normalize_for_grid(df)
+        return disp, disp.to_numpy(dtype=object, na_value=""), self._grid_widths(disp)
+
+    def _apply_result_dataframe_to_grid(self, tree: ttk.Treeview, df: pd.DataFrame, state: dict):
+        token = state["job"] = object()  # a newer apply (e.g. a sort click) supersedes an in-flight one
+        if df.size < self._GRID_ASYNC_CELLS:
+            self._show_prepared_grid(tree, state, self._prepare_grid(df)); return
+        self.status_var.set(f"Formatting {len(df):,} rows…")
+        def done(prep):
+            if state.get("job") is token and tree.winfo_exists():
+                self._show_prepared_grid(tree, state, prep)
+        self._run_in_background(lambda _: self._prepare_grid(df), done, "Result")
+
+    def _show_prepared_grid(self, tree: ttk.Treeview, state: dict, prep):
+        disp, arr, widths = prep
+        _tree_clear(tree)
+        cols_display = ["#"] + [str(c) for c in disp.columns]
+        if state.get("cols") != cols_display:
+            self._setup_grid_columns(tree, cols_display, widths)
+            state["cols"], state["_arrow_col"] = cols_display, None
     
-        to_str = lambda v: "" if (v is None or (isinstance(v, float) and pd.isna(v))) else str(v)
-        for i, row in enumerate(disp_display.itertuples(index=False, name=None)):
-            tree.insert("", "end", iid=str(i), values=[to_str(v) for v in row])
+        state["arr"] = arr
+        state["win"] = (0, 0)
+        self._grid_fill(state, 0)
+        tree.yview_moveto(0)
     
-        state["df_cur"] = disp.copy()
+        state["df_cur"] = state["df_norm"] = disp
         for b in (self.btn_csv, self.btn_xlsx, self.btn_json, self.btn_copy, self.btn_prof):
             b.config(state=tk.NORMAL)
         self.status_var.set(f"Rows: {len(disp)}")
 
+    # The result grid is virtual: only a window of rows lives in the Treeview (iid = row
+    # position in state["arr"]); the vertical scrollbar is mapped onto the full row count.
+    _GRID_WINDOW = 600
+    _GRID_MARGIN = 100
+
+    @staticmethod
+    def _grid_rows(arr, a: int, b: int):
+        # map(str) per cell: ndarray.astype(str) can't take LIST (ndarray) or BLOB cells.
+        return [(str(i), *map(str, r)) for i, r in enumerate(arr[a:b].tolist(), a + 1)]
+
+    def _grid_fill(self, state: dict, start: int):
+        """Moves the materialized window to [start, start+_GRID_WINDOW), touching only rows that change."""
+        tree, arr = state["tree"], state["arr"]
+        n = len(arr)
+        start = max(0, min(start, n - self._GRID_WINDOW))
+        end = min(n, start + self._GRID_WINDOW)
+        old_start, old_end = state["win"]
+        keep_lo, keep_hi = max(start, old_start), min(end, old_end)
+        if keep_lo >= keep_hi:
+            _tree_clear(tree)
+            _tree_insert_rows(tree, self._grid_rows(arr, start, end), start)
+        else:
+            gone = [str(i) for i in (*range(old_start, keep_lo), *range(keep_hi, old_end))]
+            if gone: tree.delete(*gone)
+            if start < keep_lo: _tree_insert_rows(tree, self._grid_rows(arr, start, keep_lo), start, index=0)
+            if keep_hi < end:   _tree_insert_rows(tree, self._grid_rows(arr, keep_hi, end), keep_hi)
+        state["win"] = (start, end)
+
+    def _grid_yscroll(self, state: dict, lo, hi):
+        """Treeview yscrollcommand: translate window fractions to whole-result fractions."""
+        start, end = state["win"]
+        n = len(state["arr"]) if state.get("arr") is not None else 0
+        if not n or end <= start:
+            state["vsb"].set(0, 1); return
+        top = start + float(lo) * (end - start)
+        bot = start + float(hi) * (end - start)
+        state["vsb"].set(top / n, bot / n)
+        near_edge = (top - start < self._GRID_MARGIN and start > 0) or (end - bot < self._GRID_MARGIN and end < n)
+        if near_edge and not state.get("recenter"):
+            state["recenter"] = self.after_idle(lambda: self._grid_recenter(state))
+
+    def _grid_show_row(self, state: dict, top: float):
+        """Scrolls so that result row `top` (fractional) is the first visible one."""
+        start, end = state["win"]
+        span = float(state["tree"].yview()[1]) - float(state["tree"].yview()[0])
+        visible = span * max(1, end - start)
+        if not (start <= top and top + visible <= end):
+            self._grid_fill(state, int(top - (self._GRID_WINDOW - visible) / 2))
+            start, end = state["win"]
+        state["tree"].yview_moveto((top - start) / max(1, end - start))
+
+    def _grid_recenter(self, state: dict):
+        state["recenter"] = None
+        tree = state["tree"]
+        if not tree.winfo_exists(): return
+        start, end = state["win"]
+        lo, hi = (float(f) for f in tree.yview())
+        top, visible = start + lo * (end - start), (hi - lo) * (end - start)
+        self._grid_fill(state, int(top - (self._GRID_WINDOW - visible) / 2))
+        new_start, new_end = state["win"]
+        if (new_start, new_end) != (start, end):
+            tree.yview_moveto((top - new_start) / max(1, new_end - new_start))
+
+    def _grid_yview(self, state: dict, *args):
+        """Vertical scrollbar command: "moveto" addresses the whole result, "scroll" the tree."""
+        n = len(state["arr"]) if state.get("arr") is not None else 0
+        if args and args[0] == "moveto" and n:
+            self._grid_show_row(state, max(0.0, min(float(args[1]), 1.0)) * n)
+        else:
+            state["tree"].yview(*args)
+
     def results_show_dataframe(self, df: pd.DataFrame, title: str|None=None):
         title = title or self._get_active_editor_title() or "Result"
         frm = self._create_result_tab(title)
         tree, state = self._get_active_result_tree()
-        state["df_orig"] = df.copy()
+        state["df_orig"] = df
         state["sort"].clear()
         self._apply_result_dataframe_to_grid(tree, df, state)
         self.nb.select(self.tab_results)
@@ -1183,22 +1901,36 @@ class App(tk.Tk):
         prev = state["sort"].get(col)
         new_state = "asc" if prev is None else ("desc" if prev == "asc" else None)
         state["sort"].clear(); state["sort"][col] = new_state
+        state["df_norm"] = None
     
         if new_state is None:
-            df = state["df_orig"].copy()
+            df = state["df_orig"]
         else:
             ascending = (new_state == "asc")
             try:
-                df = state["df_orig"].sort_values(by=col, ascending=ascending, kind="mergesort")
+                df = state["df_orig"].take(self._arrow_sort_order(state, col, ascending))
+            except Exception:
+                df = None
+            try:
+                if df is None: df = state["df_orig"].sort_values(by=col, ascending=ascending, kind="mergesort")
             except Exception:
-                df2 = state["df_orig"].copy()
-                df2[col] = df2[col].astype(str)
-                df = df2.sort_values(by=col, ascending=ascending, kind="mergesort")
+                df = state["df_orig"].sort_values(by=col, ascending=ascending, kind="mergesort", key=lambda s: s.astype(str))
     
         self._apply_result_dataframe_to_grid(tree, df, state)
         arrow = " ▲" if new_state=="asc" else (" ▼" if new_state=="desc" else "")
-        for c in tree["columns"]:
-            tree.heading(c, text=c + (arrow if c==col and new_state else ""))
+        prev = state.get("_arrow_col")
+        if prev and prev != col: tree.heading(prev, text=prev)
+        tree.heading(col, text=col + arrow)
+        state["_arrow_col"] = col if new_state else None
+
+    @staticmethod
+    def _arrow_sort_order(state: dict, col: str, ascending: bool):
+        """Stable sort permutation via Arrow; the column is converted once per result tab and kept."""
+        cols = state.setdefault("arrow_cols", {})
+        if col not in cols:
+            cols[col] = pa.array(state["df_orig"][col], from_pandas=True)
+        return pc.array_sort_indices(cols[col], order="ascending" if ascending else "descending",
+                                     null_placement="at_end").to_numpy()
 
     def _grid_context(self, event, tree=None):
         tree = tree or (self._get_active_result_tree()[0])
@@ -1206,10 +1938,10 @@ class App(tk.Tk):
         iid = tree.identify_row(event.y)
         col = tree.identify_column(event.x)
         if iid: tree.selection_set(iid)
-        menu = tk.Menu(self, tearoff=False)
-        menu.add_command(label="Copy Cell", command=lambda: self._copy_cell(tree=tree))
-        menu.add_command(label="Copy Row", command=lambda: self._copy_row(iid, tree=tree))
-        menu.add_command(label="Copy Column", command=lambda: self._copy_column(col, tree=tree))
+        menu = self._context_menu("grid")
+        menu.add_command(label="Copy Cell", command=partial(self._copy_cell, tree=tree))
+        menu.add_command(label="Copy Row", command=partial(self._copy_row, iid, tree=tree))
+        menu.add_command(label="Copy Column", command=partial(self._copy_column, col, tree=tree))
         menu.add_separator()
         menu.add_command(label="Copy (TSV with headers)", command=self.copy_result_to_clipboard)
         menu.post(event.x_root, event.y_root)
@@ -1251,7 +1983,7 @@ class App(tk.Tk):
             return
     
         frm = self.res_nb.select(); st = self._res_tabs.get(frm)
-        if not st or st["df_cur"] is None or st["df_cur"].empty: return
+        if not st or st["df_norm"] is None or st["df_cur"].empty: return
     
         if clicked_idx == 0:
             name = "#"
@@ -1262,9 +1994,9 @@ class App(tk.Tk):
             if real_idx < 0 or real_idx >= len(cols):
                 return
             name = cols[real_idx]
-            series = self._normalize_for_grid(st["df_cur"])[name]
+            series = st["df_norm"].iloc[:, real_idx]
     
-        txt = name + "\n" + "\n".join("" if (v is None or (isinstance(v, float) and pd.isna(v))) else str(v) for v in series.tolist())
+        txt = name + "\n" + "\n".join(series.astype(str).tolist())
         self.clipboard_clear(); self.clipboard_append(txt); self.update()
         self.status_var.set(f"Column '{name}' copied")
 
@@ -1274,20 +2006,44 @@ class App(tk.Tk):
             messagebox.showinfo("Export","No result."); return
         fp = filedialog.asksaveasfilename(title="Save CSV", defaultextension=".csv", filetypes=[("CSV",".csv")])
         if not fp: return
-        st["df_cur"].to_csv(fp, index=False, encoding="utf-8-sig")
-        messagebox.showinfo("Export", f"Saved: {fp}")
+        df, n = st["df_cur"], len(st["df_cur"])
+        self.status_var.set("Exporting CSV…")
+        self._run_in_background(
+            lambda progress: _write_csv_frame(df, fp, progress),
+            lambda _: (self.status_var.set(f"Saved: {fp}"), messagebox.showinfo("Export", f"Saved: {fp}")),
+            "Export", lambda done: self.status_var.set(f"Exporting CSV… {done:,}/{n:,} rows"))
+
+    def _run_in_background(self, work, done, title: str, on_progress=None):
+        """work(progress) runs on a daemon thread; done(result), on_progress and errors are handled on the Tk thread."""
+        box = {"progress": None}
+        def run():
+            try: box["result"] = work(lambda v: box.__setitem__("progress", v))
+            except Exception as e: box["error"] = e
+        th = threading.Thread(target=run, daemon=True); th.start()
+        def poll():
+            if th.is_alive():
+                if on_progress and box["progress"] is not None: on_progress(box["progress"])
+                self.after(100, poll); return
+            if "error" in box:
+                self.status_var.set(f"{title} failed"); messagebox.showerror(title, str(box["error"]))
+            else:
+                done(box.get("result"))
+        self.after(100, poll)
     
     def export_result_xlsx(self):
         tree, st = self._get_active_result_tree()
         if not st or st["df_cur"] is None or st["df_cur"].empty:
             messagebox.showinfo("Export","No result."); return
-        if openpyxl is None: 
-            messagebox.showerror("Export","openpyxl required"); return
+        if xlsxwriter is None and _openpyxl() is None:
+            messagebox.showerror("Export","xlsxwriter or openpyxl required"); return
         fp = filedialog.asksaveasfilename(title="Save Excel", defaultextension=".xlsx", filetypes=[("Excel",".xlsx")])
         if not fp: return
-        with pd.ExcelWriter(fp, engine="openpyxl") as w:
-            st["df_cur"].to_excel(w, index=False, sheet_name="Result")
-        messagebox.showinfo("Export", f"Saved: {fp}")
+        df = st["df_cur"]
+        self.status_var.set("Exporting Excel…")
+        self._run_in_background(
+            lambda _: _write_excel_frame(df, fp),
+            lambda _: (self.status_var.set(f"Saved: {fp}"), messagebox.showinfo("Export", f"Saved: {fp}")),
+            "Export")
     
     def export_result_json(self):
         tree, st = self._get_active_result_tree()
@@ -1301,42 +2057,25 @@ class App(tk.Tk):
     def copy_result_to_clipboard(self):
         tree, st = self._get_active_result_tree()
         if not st or st["df_cur"] is None or st["df_cur"].empty: return
-        text = st["df_cur"].to_csv(sep="\t", index=False)
-        self.clipboard_clear(); self.clipboard_append(text); self.update()
+        df = st["df_cur"]
+        self.clipboard_clear()
+        for off in range(0, len(df), 50_000):  # Tk concatenates appends; keeps only one chunk as a Python str
+            self.clipboard_append(df.iloc[off:off + 50_000].to_csv(sep="\t", index=False, header=off == 0))
+        self.update()
         self.status_var.set("Result copied to clipboard (TSV)")
 
     def _split_sql(self, sql: str):
-        stmts, buf = [], []
-        in_s=in_d=False; esc=False; i=0
-        def flush():
-            s = "".join(buf).strip()
-            if s: stmts.append(s); buf.clear()
-        while i<len(sql):
-            if not in_s and not in_d:
-                m = re.match(r"(?m)^\s*GO\s*(--.*)?$", sql[i:])
-                if m:
-                    flush(); nl = sql.find("\n", i); i = len(sql) if nl==-1 else nl+1; continue
-            ch = sql[i]
-            if ch=="\\" and not esc: esc=True; buf.append(ch); i+=1; continue
-            if ch=="'" and not in_d and not esc: in_s = not in_s
-            elif ch=='"' and not in_s and not esc: in_d = not in_d
-            esc=False
-            if ch==";" and not in_s and not in_d: flush()
-            else: buf.append(ch)
-            i+=1
-        if buf: flush()
-        return stmts
+        """Splits on ; and on GO lines, ignoring both inside '…'/"…" literals, comments and after a backslash."""
+        return [part for _, _, part in _split_sql_spans(sql)]
 
     def _current_stmt(self) -> str:
-        txt = self.editor.get("1.0", tk.END); idx = self.editor.index(tk.INSERT)
-        parts = self._split_sql(txt)
-        cur_abs = int(self.editor.count("1.0", idx, "chars")[0])
-        pos = 0
-        for part in parts:
-            seg = part + ";"; start, end = pos, pos+len(seg)
-            if start <= cur_abs <= end: return part
-            pos = end
-        return txt
+        txt = self.editor.get("1.0", "end-1c")
+        spans = _split_sql_spans(txt)
+        if not spans: return txt
+        line, col = map(int, self.editor.index(tk.INSERT).split("."))
+        cur_abs = _line_starts(txt)[line - 1] + col
+        i = bisect_left([end for _, end, _ in spans], cur_abs)
+        return spans[min(i, len(spans) - 1)][2]
     
     def _get_selection_or_current_stmt(self) -> str:
         """If a selection exists, return it; otherwise return the current statement at the cursor."""
@@ -1352,60 +2091,119 @@ class App(tk.Tk):
         sql = (self._get_selection_or_current_stmt() or "").strip()
         if not sql:
             return
-        self._execute_sql(sql, open_result_tab_per_stmt=True)
+        if not self._execute_sql(sql, open_result_tab_per_stmt=True):
+            return
         try:
             self.editor.get("sel.first", "sel.last")
-            self.status_var.set("Ran selection (Ctrl+Enter)")
+            self.status_var.set("Running selection (Ctrl+Enter)…")
         except tk.TclError:
-            self.status_var.set("Ran current statement (Ctrl+Enter)")
+            self.status_var.set("Running current statement (Ctrl+Enter)…")
 
     def run_query(self):
-        sql = self.editor.get("1.0", tk.END).strip()
-        if not sql: return
+        sql = self.editor.get("1.0", "end-1c")
+        if not sql or sql.isspace(): return
         self._execute_sql(sql, open_result_tab_per_stmt=True)
 
-    def _execute_sql(self, sql: str, open_result_tab_per_stmt: bool = True):
-        t0 = time.time(); last_df=None; wrote=False; did_ctas=False
+    def _script_running(self) -> bool:
+        """True (and says so) while a script runs; catalog-changing actions wait for it."""
+        if self._query_cancel is None: return False
+        self.status_var.set("A query is running (Stop to cancel it)")
+        return True
+
+    def _execute_sql(self, sql: str, open_result_tab_per_stmt: bool = True) -> bool:
+        """Starts the script on a worker thread (False if one is already running); results come back through a queue.
+        The worker runs on its own catalog cursor; Refresh/Disconnect/Add/Undo and the tree wait until it ends."""
+        if self._script_running(): return False
         self.msgbox.delete("1.0", tk.END)
+        base_title = self._get_active_editor_title()
+        events, cancel = queue.Queue(), threading.Event()
+        catalog, con = self.catalog, self.catalog.cursor()
+        def work():
+            t0 = time.time(); last_df=None; wrote=False; did_ctas=False
+            catalog.use_connection(con)
+            try:
+                stmts = self._split_sql(sql)
+                select_idx = 0
+                for stmt in stmts:
+                    if cancel.is_set(): break
+                    # Per statement: a CTAS / write-back re-attaches its schema and renames internals.
+                    stmt = self.catalog.names.rewrite_sql(stmt, self.catalog.schema_tables())
+                    path = self.catalog.maybe_ctas(stmt)
+                    if path:
+                        did_ctas = True
+                        events.put(("msg", f"CTAS → CSV saved:\n{path}\n"))
+                        continue
+                    if self.catalog.maybe_write_back(stmt):
+                        wrote=True; events.put(("msg", "Write-back done.\n")); continue
+                    df = self.catalog.run_query_limited(stmt, None)
+                    last_df = df
+                    if open_result_tab_per_stmt:
+                        select_idx += 1
+                        tab_title = base_title if len(stmts) == 1 else f"{base_title} · {select_idx}"
+                        events.put(("df", df, tab_title))
+                events.put(("done", (time.time()-t0)*1000, last_df is None, wrote or did_ctas))
+            except Exception as e:
+                events.put(("error", e, wrote or did_ctas))
+            finally:
+                catalog.use_connection(None)
+                con.close()
+        self._query_cancel, self._query_con = cancel, con
+        for b in (self.btn_refresh, self.btn_connect, self.btn_undo):
+            b.config(state=tk.DISABLED)
+        self.btn_stop.config(state=tk.NORMAL)
+        self.status_var.set("Running…")
+        threading.Thread(target=work, daemon=True).start()
+        self.after(30, self._drain_query_events, events, open_result_tab_per_stmt)
+        return True
+
+    def _drain_query_events(self, events: queue.Queue, open_result_tab_per_stmt: bool):
+        while True:
+            try: ev = events.get_nowait()
+            except queue.Empty:
+                self.after(30, self._drain_query_events, events, open_result_tab_per_stmt); return
+            if ev[0] not in ("msg", "df"): break
+            try:
+                if ev[0] == "msg": self._messages_write(ev[1])
+                else: self.results_show_dataframe(ev[1], title=ev[2])
+            except Exception as e:
+                self._messages_write(f"ERROR: {e}\n")
+        cancelled = self._query_cancel.is_set()
         try:
-            stmts = self._split_sql(sql)
-            schema_tables = {}
-            for (sch, internal), _ in self.catalog.registry.items():
-                disp = self.catalog.names.to_display(sch, internal) or internal
-                schema_tables.setdefault(sch, []).append(disp)
-            base_title = self._get_active_editor_title()
-            select_idx = 0
-            for stmt in stmts:
-                if not stmt.strip(): 
-                    continue
-                stmt = self.catalog.names.rewrite_sql(stmt, schema_tables)
-                path = self.catalog.maybe_ctas(stmt)
-                if path:
-                    did_ctas = True
-                    self._messages_write(f"CTAS → CSV saved:\n{path}\n")
-                    continue
-                if self.catalog.maybe_write_back(stmt):
-                    wrote=True; self._messages_write("Write-back done.\n"); continue
-                df = self.catalog.run_query_limited(stmt, None)
-                last_df = df
-                if open_result_tab_per_stmt:
-                    select_idx += 1
-                    tab_title = base_title if len(stmts) == 1 else f"{base_title} · {select_idx}"
-                    self.results_show_dataframe(df, title=tab_title)
-            if last_df is None and not open_result_tab_per_stmt:
-                self.results_show_dataframe(pd.DataFrame(), title="Result")
-                self.status_var.set(f"Done in {(time.time()-t0)*1000:.1f} ms (no rows)")
+            if ev[0] == "error":
+                e = ev[1]
+                if cancelled:
+                    self.status_var.set("Query cancelled"); self._messages_write("Cancelled.\n")
+                elif isinstance(e, PermissionError):
+                    messagebox.showerror("Query Error","Close the file in Excel and try again.")
+                    self._messages_write("ERROR: Permission denied\n")
+                else:
+                    messagebox.showerror("Query Error", str(e))
+                    self._messages_write(f"ERROR: {e}\n")
             else:
-                self.status_var.set(f"Done — {(time.time()-t0)*1000:.1f} ms")
-                self._messages_write(self.status_var.get() + "\n")
-            if wrote or did_ctas:
-                self.refresh_catalog()
-        except PermissionError:
-            messagebox.showerror("Query Error","Close the file in Excel and try again.")
-            self._messages_write("ERROR: Permission denied\n")
+                _, ms, no_rows, _ = ev
+                if no_rows and not open_result_tab_per_stmt:
+                    self.results_show_dataframe(pd.DataFrame(), title="Result")
+                    self.status_var.set(f"Done in {ms:.1f} ms (no rows)")
+                else:
+                    self.status_var.set(f"{'Cancelled' if cancelled else 'Done'} — {ms:.1f} ms")
+                    self._messages_write(self.status_var.get() + "\n")
         except Exception as e:
-            messagebox.showerror("Query Error", str(e))
             self._messages_write(f"ERROR: {e}\n")
+        finally:
+            self._query_cancel = self._query_con = None
+            self.btn_stop.config(state=tk.DISABLED)
+            self.btn_connect.config(state=tk.NORMAL)
+            for b in (self.btn_refresh, self.btn_undo):
+                b.config(state=tk.NORMAL if self.servers else tk.DISABLED)
+        if ev[-1]:  # files changed, also when the script was stopped or failed after writing
+            self.refresh_catalog()
+
+    def cancel_query(self):
+        if self._query_cancel is None: return
+        self._query_cancel.set()
+        self.status_var.set("Cancelling…")
+        try: self._query_con.interrupt()
+        except Exception: pass
 
     def _messages_write(self, text: str):
         self.msgbox.insert(tk.END, text); self.msgbox.see(tk.END)
@@ -1443,38 +2241,52 @@ class App(tk.Tk):
         txt.tag_configure("find_all", background="#fff4b1")
         txt.tag_configure("find_cur", background="#ffe187")
     
+    def _schedule_highlight(self, tab: EditorTab, delay: int = 50):
+        if tab._hl_after: self.after_cancel(tab._hl_after)
+        tab._hl_after = self.after(delay, lambda: self._apply_sql_highlighting(tab))
+
+    _HL_MAX_VIEW = 200_000  # chars; a viewport bigger than this (minified one-liners) is left plain
+
+    def _toggle_highlighting(self):
+        on = self._hl_enabled.get()
+        for tab in self._editor_tabs.values():
+            tab._hl_view = None
+            if on: self._schedule_highlight(tab)
+            else:
+                for t in _HL_TAGS: tab.text.tag_remove(t, "1.0", tk.END)
+        self.status_var.set(f"Syntax highlighting {'on' if on else 'off'}")
+
     def _apply_sql_highlighting(self, tab: EditorTab|None=None):
-        txt = (tab.text if isinstance(tab, EditorTab) else self.editor)
-        if not txt: return
-        text = txt.get("1.0", tk.END)
-        for t in ("kw","fn","str","com","num"):
-            txt.tag_remove(t, "1.0", tk.END)
+        """Re-highlights only the visible lines; scrolling re-schedules it from the tab's yscrollcommand."""
+        if not isinstance(tab, EditorTab): tab = self._editor_tabs.get(self.ed_nb.select())
+        if not tab or not tab.winfo_exists(): return
+        tab._hl_after = None
+        if not self._hl_enabled.get(): return
+        txt = tab.text
+        first = txt.index("@0,0 linestart")
+        last = txt.index(f"@0,{max(1, txt.winfo_height())} lineend")
+        if tab._hl_view == (first, last): return  # unchanged buffer, same viewport: tags are current
+        tab._hl_view = (first, last)
+        for t in _HL_TAGS:
+            txt.tag_remove(t, first, last)
+        text = txt.get(first, last)
         if not text.strip(): return
-        for m in re.finditer(r"--.*?$", text, re.M): self._tag_range(txt, m.start(), m.end(), "com")
-        for m in re.finditer(r"'(?:''|[^'])*'", text): self._tag_range(txt, m.start(), m.end(), "str")
-        for m in re.finditer(r"\b\d+(?:\.\d+)?\b", text): self._tag_range(txt, m.start(), m.end(), "num")
-        kw=r"\b(SELECT|FROM|WHERE|GROUP|BY|ORDER|LIMIT|OFFSET|JOIN|LEFT|RIGHT|FULL|OUTER|INNER|ON|AND|OR|NOT|IN|IS|NULL|AS|CASE|WHEN|THEN|ELSE|END|WITH|UNION|ALL|INSERT|INTO|VALUES|UPDATE|SET|DELETE|CREATE|TABLE|VIEW|SCHEMA|DROP|DESCRIBE|EXPLAIN)\b"
-        fn=r"\b(COUNT|SUM|AVG|MIN|MAX|COALESCE|ROUND|CAST|DATE|YEAR|MONTH|DAY|LOWER|UPPER|LENGTH|SUBSTRING|REGEXP_MATCHES)\b"
-        for m in re.finditer(kw, text, re.I): self._tag_range(txt, m.start(), m.end(), "kw")
-        for m in re.finditer(fn, text, re.I): self._tag_range(txt, m.start(), m.end(), "fn")
-    
-    def _tag_range(self, txt: tk.Text, sidx, eidx, tag):
-        text = txt.get("1.0", tk.END)
-        line = text.count("\n", 0, sidx) + 1
-        col = sidx - (text.rfind("\n", 0, sidx) + 1 if text.rfind("\n", 0, sidx)!=-1 else 0)
-        s = f"{line}.{col}"
-        line2 = text.count("\n", 0, eidx) + 1
-        col2 = eidx - (text.rfind("\n", 0, eidx) + 1 if text.rfind("\n", 0, eidx)!=-1 else 0)
-        e = f"{line2}.{col2}"
-        txt.tag_add(tag, s, e)
+        if len(text) > self._HL_MAX_VIEW:
+            self.status_var.set("Very long lines in view: syntax highlighting skipped"); return
+        # A literal opened above the viewport: lex as if its quote were just before `first`.
+        line0 = int(first.split(".")[0])
+        idx = _offset_indexer(text, line0)
+        shift = 1 if tab.in_string_at(line0) else 0
+        if shift: text = "'" + text
+        spans = {t: [] for t in _HL_TAGS}
+        for m in _RE_HL.finditer(text):
+            spans[m.lastgroup] += (idx(max(0, m.start() - shift)), idx(m.end() - shift))
+        for tag, pairs in spans.items():  # one variadic tag_add per tag instead of one Tcl call per match
+            if pairs: txt.tag_add(tag, *pairs)
 
     def _update_line_numbers(self):
-        self.linenum.delete("all")
-        text = self.editor.get("1.0", tk.END)
-        lines = text.count("\n") + 1
-        for i in range(1, lines+1):
-            y = self.editor.dlineinfo(f"{i}.0")
-            if y: self.linenum.create_text(2, y[1], anchor="nw", text=str(i), fill="#999")
+        tab = self._editor_tabs.get(self.ed_nb.select())
+        if tab: tab.update_linenum()
 
     def toggle_comment(self):
         try:
@@ -1483,12 +2295,12 @@ class App(tk.Tk):
             cur = self.editor.index(tk.INSERT)
             line_start = f"{cur.split('.')[0]}.0"; line_end = f"{int(cur.split('.')[0])}.end"
             text = self.editor.get(line_start, line_end)
-            new = re.sub(r"^\s*--\s?", "", text) if text.lstrip().startswith("--") else "-- " + text
+            new = _RE_LINE_COMMENT.sub("", text) if text.lstrip().startswith("--") else "-- " + text
             self.editor.delete(line_start, line_end); self.editor.insert(line_start, new); self._apply_sql_highlighting(); self._update_line_numbers(); return
         lines = self.editor.get(start, end).splitlines()
         cnt = sum(1 for ln in lines if ln.lstrip().startswith("--"))
         mode = cnt < len(lines)/2
-        new_lines = [("-- "+ln) if mode else re.sub(r"^\s*--\s?","", ln) for ln in lines]
+        new_lines = [("-- "+ln) if mode else _RE_LINE_COMMENT.sub("", ln) for ln in lines]
         self.editor.delete(start, end); self.editor.insert(start, "\n".join(new_lines))
         self._apply_sql_highlighting(); self._update_line_numbers()
 
@@ -1543,69 +2355,69 @@ class App(tk.Tk):
         self._find_highlight_all()
         ent.focus_set()
 
-    def _find_opts(self):
-        nocase = 0 if self._find_case.get() else 1
-        regexp = True if self._find_regex.get() else False
-        return {"nocase": nocase, "regexp": regexp}
+    def _find_pattern(self):
+        """Compiled Python regex for the Find box (escaped unless Regex is ticked); None if it doesn't compile."""
+        term = self._find_term.get()
+        flags = 0 if self._find_case.get() else _rx.IGNORECASE
+        try:
+            return _rx.compile(term if self._find_regex.get() else _rx.escape(term), flags)
+        except _rx.error as e:
+            self.status_var.set(f"Regex error: {e}"); return None
     
     def _find_highlight_all(self):
+        """One regex pass over a snapshot of the buffer; matches are tagged with a single tag_add."""
         term = self._find_term.get()
         self.editor.tag_remove("find_all", "1.0", tk.END)
         self.editor.tag_remove("find_cur", "1.0", tk.END)
+        self._find_spans = []
         if not term:
             self.status_var.set("Ready."); return
-        start = "1.0"; count_var = tk.IntVar(); n = 0
-        while True:
-            idx = self.editor.search(term, start, stopindex=tk.END, count=count_var, **self._find_opts())
-            if not idx: break
-            end = self.editor.index(f"{idx}+{count_var.get()}c")
-            self.editor.tag_add("find_all", idx, end)
-            n += 1; start = end
-        self.status_var.set(f"Found {n} match(es).")
+        rx = self._find_pattern()
+        if rx is None: return
+        text = self.editor.get("1.0", "end-1c")
+        idx = _offset_indexer(text)
+        spans = self._find_spans = [(idx(m.start()), idx(m.end())) for m in rx.finditer(text) if m.end() > m.start()]
+        if spans:
+            self.editor.tag_add("find_all", *(i for span in spans for i in span))
+        self.status_var.set(f"Found {len(spans)} match(es).")
         self._find_last_index = "1.0"; self._find_last_term = term
     
-    def _find_jump_to(self, idx, length):
-        end = self.editor.index(f"{idx}+{length}c")
+    def _find_jump_to(self, idx, end):
         self.editor.tag_remove("find_cur", "1.0", tk.END)
         self.editor.tag_add("find_cur", idx, end)
         self.editor.tag_remove("sel", "1.0", tk.END)
         self.editor.tag_add("sel", idx, end)
         self.editor.mark_set(tk.INSERT, end)
         self.editor.see(idx)
+
+    @staticmethod
+    def _index_key(index: str):
+        line, col = index.split(".")
+        return int(line), int(col)
     
     def _find_next(self):
         term = self._find_term.get()
         if not term: self.status_var.set("Type something to find."); return
-        if term != getattr(self, "_find_last_term", ""): self._find_highlight_all()
+        self._find_highlight_all()
         try: start = self.editor.index("sel.last")
         except tk.TclError: start = self.editor.index(tk.INSERT)
-        count_var = tk.IntVar()
-        idx = self.editor.search(term, start, stopindex=tk.END, count=count_var, **self._find_opts())
-        if not idx and self._find_wrap.get():
-            idx = self.editor.search(term, "1.0", stopindex=tk.END, count=count_var, **self._find_opts())
-        if not idx: self.status_var.set("No more matches."); return
-        self._find_jump_to(idx, count_var.get())
+        starts = [self._index_key(a) for a, _ in self._find_spans]
+        k = bisect_left(starts, self._index_key(start))
+        if k == len(starts) and self._find_wrap.get(): k = 0
+        if k >= len(starts): self.status_var.set("No more matches."); return
+        self._find_jump_to(*self._find_spans[k])
     
     def _find_prev(self):
         term = self._find_term.get()
         if not term: self.status_var.set("Type something to find."); return
+        self._find_highlight_all()
         try: cur = self.editor.index("sel.first")
         except tk.TclError: cur = self.editor.index(tk.INSERT)
-        count_var = tk.IntVar(); last_idx, last_len = None, 0; start = "1.0"
-        while True:
-            idx = self.editor.search(term, start, stopindex=cur, count=count_var, **self._find_opts())
-            if not idx: break
-            last_idx, last_len = idx, count_var.get()
-            start = self.editor.index(f"{idx}+{count_var.get()}c")
-        if not last_idx and self._find_wrap.get():
-            start = "1.0"; cur = tk.END
-            while True:
-                idx = self.editor.search(term, start, stopindex=cur, count=count_var, **self._find_opts())
-                if not idx: break
-                last_idx, last_len = idx, count_var.get()
-                start = self.editor.index(f"{idx}+{count_var.get()}c")
-        if not last_idx: self.status_var.set("No previous matches."); return
-        self._find_jump_to(last_idx, last_len)
+        starts = [self._index_key(a) for a, _ in self._find_spans]
+        k = bisect_left(starts, self._index_key(cur)) - 1
+        if k < 0 and self._find_wrap.get(): k = len(starts) - 1
+        if k < 0: self.status_var.set("No previous matches."); return
+        self._find_jump_to(*self._find_spans[k])
 
     def _current_match_range(self):
         """Returns (start, end) for the current match if any, else None."""
@@ -1621,12 +2433,12 @@ class App(tk.Tk):
     def _compute_replacement_text(self, matched_text: str):
         """Computes replacement text according to options."""
         repl = self._replace_term.get()
-        term = self._find_term.get()
         if self._find_regex.get():
-            flags = 0 if self._find_case.get() else re.IGNORECASE
+            rx = self._find_pattern()
+            if rx is None: return matched_text
             try:
-                return re.sub(term, repl, matched_text, count=1, flags=flags)
-            except re.error as e:
+                return rx.sub(repl, matched_text, count=1)
+            except _rx.error as e:
                 messagebox.showerror("Regex Error", f"{e}")
                 return matched_text
         else:
@@ -1655,28 +2467,26 @@ class App(tk.Tk):
         self.status_var.set("Replaced.")
     
     def _replace_all(self):
+        """Rewrites the whole buffer from one regex substitution, as a single undo step."""
         term = self._find_term.get()
         if not term:
             self.status_var.set("Type something to find."); return
-    
-        start = "1.0"
-        count_var = tk.IntVar()
-        replaced = 0
-    
-        self.editor.edit_separator()
-        while True:
-            idx = self.editor.search(term, start, stopindex=tk.END, count=count_var, **self._find_opts())
-            if not idx:
-                break
-            end = self.editor.index(f"{idx}+{count_var.get()}c")
-            matched = self.editor.get(idx, end)
-            newtxt = self._compute_replacement_text(matched)
-    
-            self.editor.delete(idx, end)
-            self.editor.insert(idx, newtxt)
-            replaced += 1
-            start = self.editor.index(f"{idx}+{len(newtxt)}c")
-        self.editor.edit_separator()
+        rx = self._find_pattern()
+        if rx is None: return
+        repl = self._replace_term.get()
+        text = self.editor.get("1.0", "end-1c")
+        try:
+            new, replaced = rx.subn(repl if self._find_regex.get() else (lambda m: repl), text)
+        except _rx.error as e:
+            messagebox.showerror("Regex Error", f"{e}"); return
+    
+        if replaced:
+            view, cur = self.editor.yview()[0], self.editor.index(tk.INSERT)
+            self.editor.edit_separator()
+            self.editor.delete("1.0", "end-1c")
+            self.editor.insert("1.0", new)
+            self.editor.edit_separator()
+            self.editor.mark_set(tk.INSERT, cur); self.editor.yview_moveto(view)
     
         self._find_highlight_all()
         self.status_var.set(f"Replaced {replaced} occurrence(s).")
@@ -1754,41 +2564,42 @@ class App(tk.Tk):
         if not st or st["df_cur"] is None or st["df_cur"].empty:
             messagebox.showinfo("Profiler", "No data loaded to profile.")
             return
-        df = st["df_cur"].copy()
+        df = st["df_cur"]
         try:
             desc = df.describe(include="all", datetime_is_numeric=True).T
-        except TypeError:
-            for c in df.columns:
-                try:
-                    if pd.api.types.is_datetime64_any_dtype(df[c]):
-                        df[c] = pd.to_datetime(df[c], errors="coerce").view("int64") // 10**9
-                except Exception:
-                    pass
+        except TypeError:  # pandas >= 2 dropped the flag and describes datetimes numerically by default
             desc = df.describe(include="all").T
         self.results_show_dataframe(desc, title="Profile")
         self.nb.select(self.tab_results)
         self.status_var.set(f"Profile generated for: {table_name or 'Result'}")
 
     def undo_last_write(self):
+        if self._script_running(): return
         if not self.servers:
             messagebox.showinfo("Undo", "Connect to at least one Server first.")
             return
-        latest_bak = None
-        latest_time = 0
-        for srv in self.servers:
-            for root, _, files in os.walk(srv):
-                for f in files:
-                    if f.endswith(".bak"):
-                        path = Path(root) / f
-                        t = path.stat().st_mtime
-                        if t > latest_time:
-                            latest_time = t; latest_bak = path
-        if not latest_bak:
+        roots = [Path(s) for s in self.servers]
+        baks = [b for b in self.catalog.backups
+                if b[0].exists() and any(b[0].is_relative_to(r) for r in roots)]
+        if baks:
+            self._restore_bak(baks); return
+        def scan(_):
+            with ThreadPoolExecutor(max_workers=min(8, len(roots))) as pool:
+                return [b for found in pool.map(lambda r: list(_scan_baks(r)), roots) for b in found]
+        self.status_var.set("Scanning for backups…")
+        self._run_in_background(scan, self._restore_bak, "Undo")
+
+    def _restore_bak(self, baks):
+        if not baks:
+            self.status_var.set("No .bak files found.")
             messagebox.showinfo("Undo", "No .bak files found.")
             return
+        latest_bak = max(baks, key=lambda b: b[1])[0]
         orig = latest_bak.with_suffix("")
         try:
             os.replace(latest_bak, orig)
+            self.catalog.backups = [b for b in self.catalog.backups if b[0] != latest_bak]
+            self.status_var.set(f"Restored backup: {orig.name}")
             messagebox.showinfo("Undo", f"Restored backup:\n{orig.name}")
             self.refresh_catalog()
         except Exception as e:
@@ -1798,15 +2609,17 @@ class App(tk.Tk):
         frm = ttk.Frame(self.res_nb)
         frm.rowconfigure(0, weight=1); frm.columnconfigure(0, weight=1)
         tree = ttk.Treeview(frm, show="headings", selectmode="extended")
-        g_v = ttk.Scrollbar(frm, orient="vertical", command=tree.yview)
+        st = {"tree": tree, "df_orig": None, "df_cur": None, "df_norm": None, "sort": {}, "arr": None, "win": (0, 0)}
+        g_v = ttk.Scrollbar(frm, orient="vertical", command=lambda *a: self._grid_yview(st, *a))
         g_h = ttk.Scrollbar(frm, orient="horizontal", command=tree.xview)
+        st["vsb"] = g_v
         tree.grid(row=0, column=0, sticky="nsew"); g_v.grid(row=0, column=1, sticky="ns"); g_h.grid(row=1, column=0, sticky="ew")
-        tree.configure(yscrollcommand=g_v.set, xscrollcommand=g_h.set)
+        tree.configure(yscrollcommand=lambda lo, hi: self._grid_yscroll(st, lo, hi), xscrollcommand=g_h.set)
         tree.bind("<Button-1>", self._remember_clicked_column, add=True)
         tree.bind("<Double-1>", lambda e, t=tree: self._copy_cell(tree=t))
         tree.bind("<Button-3>", lambda e, t=tree: self._grid_context(e, tree=t))
         self.res_nb.add(frm, text=title)
-        self._res_tabs[str(frm)] = {"tree": tree, "df_orig": None, "df_cur": None, "sort": {}}
+        self._res_tabs[str(frm)] = st
         self.res_nb.select(frm)
         return frm
 
@@ -1816,9 +2629,9 @@ class App(tk.Tk):
             bbox = self.ed_nb.bbox(i)
             if bbox and (bbox[0] <= x <= bbox[0]+bbox[2]) and (bbox[1] <= y <= bbox[1]+bbox[3]):
                 self.ed_nb.select(tab_id); break
-        m = tk.Menu(self, tearoff=False)
-        m.add_command(label="New Query (Ctrl+T)", command=lambda: self._new_editor_tab())
-        m.add_command(label="Close (Ctrl+W)", command=lambda: self._close_editor_tab())
+        m = self._context_menu("editor")
+        m.add_command(label="New Query (Ctrl+T)", command=self._new_editor_tab)
+        m.add_command(label="Close (Ctrl+W)", command=self._close_editor_tab)
         m.post(event.x_root, event.y_root)
 
     def _on_result_tab_changed(self):
@@ -1844,26 +2657,26 @@ class App(tk.Tk):
             if bbox and (bbox[0] <= x <= bbox[0]+bbox[2]) and (bbox[1] <= y <= bbox[1]+bbox[3]):
                 self.res_nb.select(tab_id)
                 break
-        m = tk.Menu(self, tearoff=False)
-        m.add_command(label="Close", command=lambda: self._result_close_current())
-        m.add_command(label="Close Others", command=lambda: self._result_close_others())
-        m.add_command(label="Close All", command=lambda: self._result_close_all())
+        m = self._context_menu("results")
+        m.add_command(label="Close", command=self._result_close_current)
+        m.add_command(label="Close Others", command=self._result_close_others)
+        m.add_command(label="Close All", command=self._result_close_all)
         m.post(event.x_root, event.y_root)
     
     def _result_close_current(self):
         cur = self.res_nb.select()
         if cur: 
-            self.res_nb.forget(cur); self._res_tabs.pop(cur, None)
+            self.res_nb.forget(cur); self._res_tabs.pop(cur, None); self.nametowidget(cur).destroy()
     
     def _result_close_others(self):
         cur = self.res_nb.select()
         for t in list(self.res_nb.tabs()):
             if t != cur:
-                self.res_nb.forget(t); self._res_tabs.pop(t, None)
+                self.res_nb.forget(t); self._res_tabs.pop(t, None); self.nametowidget(t).destroy()
     
     def _result_close_all(self):
         for t in list(self.res_nb.tabs()):
-            self.res_nb.forget(t)
+            self.res_nb.forget(t); self.nametowidget(t).destroy()
         self._res_tabs.clear()
         self._on_result_tab_changed()
 class _ACPopup(tk.Toplevel):
@@ -1881,6 +2694,7 @@ class _ACPopup(tk.Toplevel):
         self.list.bind("<Double-Button-1>", lambda e: self._commit())
         self.bind("<FocusOut>", lambda e: self.hide())
         self._items = []
+        self._after = None
 
     def _move(self, delta):
         if not self.list.size(): return
@@ -1909,18 +2723,49 @@ class _ACPopup(tk.Toplevel):
         self.geometry(f"+{x}+{y}")
         self.deiconify(); self.lift(); self.focus_force()
 
-    def hide(self): self.withdraw()
+    def hide(self, event=None):
+        self._cancel(); self.withdraw()
     def is_visible(self): return bool(self.state() == "normal")
 
+    def trigger(self, event=None):
+        """Debounced: a burst of triggers (fast typing) runs _ac_trigger once, 50 ms after the last one."""
+        self._cancel()
+        self._after = self.after(50, self._fire)
+
+    def _fire(self):
+        self._after = None
+        _ac_trigger(self.master)
+
+    def _cancel(self):
+        if self._after is not None:
+            self.after_cancel(self._after); self._after = None
+
+    def forward_key(self, event):
+        """Editor Up/Down/Return/Tab go to the list while the popup is open."""
+        if self.is_visible():
+            self.list.event_generate(f"<{event.keysym}>")
+            return "break"
+
+    def bind_editor(self, txt: tk.Text):
+        txt.bind("<KeyRelease-period>", self.trigger, add=True)
+        for seq in ("<Up>", "<Down>", "<Return>", "<Tab>"):
+            txt.bind(seq, self.forward_key, add=True)
+        txt.bind("<Button-1>", self.hide, add=True)
+        txt.bind("<Key>",      self.hide, add=True)
+
+
+_ID_CHARS       = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_."
+_RE_TRAIL_COMMA = re.compile(r'\s*,\s*$')
+_RE_DOT_WS      = re.compile(r'\s*\.\s*')
+_QUOTE_TRANS    = str.maketrans('', '', '"[]')
+_RE_ALIAS       = re.compile(r'(?is)\b(?:FROM|JOIN)\s+(.+?)\s+(?:AS\s+)?([A-Za-z_]\w*)\b')
 
 def _token_at_cursor(txt: tk.Text):
     idx = txt.index(tk.INSERT)
     line = txt.get(f"{idx} linestart", f"{idx} lineend")
     col = int(idx.split(".")[1])
-    L = col
-    while L > 0 and re.match(r"[A-Za-z0-9_\.]", line[L-1]): L -= 1
-    R = col
-    while R < len(line) and re.match(r"[A-Za-z0-9_\.]", line[R:R+1]): R += 1
+    L = len(line[:col].rstrip(_ID_CHARS))
+    R = len(line) - len(line[col:].lstrip(_ID_CHARS))
     return line[L:R], L, R
 
 _SQL_KW = [
@@ -1928,6 +2773,8 @@ _SQL_KW = [
     "CASE","WHEN","THEN","ELSE","END","WITH","UNION","ALL","INSERT","INTO","VALUES","UPDATE","SET","DELETE",
     "CREATE","TABLE","VIEW","SCHEMA","DROP","DESCRIBE","EXPLAIN"
 ]
+_SQL_KW_SET = frozenset(_SQL_KW)
+_SQL_KW_SORTED = sorted(_SQL_KW_SET)
 
 def _strip_quotes(obj: str) -> str:
     if not obj:
@@ -1951,46 +2798,54 @@ def _extract_aliases(sql: str) -> dict:
     [] brackets, "" quotes, dashes, or non-Latin characters.
     """
     aliases = {}
-    pat = r'(?is)\b(?:FROM|JOIN)\s+(.+?)\s+(?:AS\s+)?([A-Za-z_]\w*)\b'
-    for m in re.finditer(pat, sql):
+    for m in _RE_ALIAS.finditer(sql):
         raw_tbl = m.group(1).strip()
         ali     = m.group(2)
-        raw_tbl = re.sub(r'\s*,\s*$', '', raw_tbl)
-        raw_tbl = re.sub(r'\s*\.\s*', '.', raw_tbl)
+        raw_tbl = _RE_TRAIL_COMMA.sub('', raw_tbl)
+        raw_tbl = _RE_DOT_WS.sub('.', raw_tbl)
         parts = [ _strip_quotes(p.strip()) for p in raw_tbl.split('.') if p.strip() ]
         tbl = '.'.join(parts) if parts else raw_tbl
         aliases[ali] = tbl
     return aliases
 
 
-def _resolve_table_display(full: str, known_tables: list[str]) -> str:
-    def _norm(s: str) -> str:
-        s = s.replace('"', '').replace('[', '').replace(']', '')
-        s = re.sub(r'\s*\.\s*', '.', s)
-        return s.strip()
+def _norm_table_name(s: str) -> str:
+    return _RE_DOT_WS.sub('.', s.translate(_QUOTE_TRANS)).strip()
+
+def _resolve_table_display(full: str, table_by_norm: dict[str, str]) -> str:
+    """Known display name for a (possibly quoted/spaced) schema.table reference; `full` itself if unknown."""
+    return table_by_norm.get(_norm_table_name(full), full)
 
-    nf = _norm(full)
-    for kt in known_tables:
-        if _norm(kt) == nf:
-            return kt
-    return full
 
 
+def _editor_aliases(app: App) -> dict:
+    """Aliases of the active buffer, re-extracted only after it was edited; callers must not mutate the dict."""
+    tab = app._editor_tabs.get(app.ed_nb.select())
+    if tab is None:
+        return _buffer_aliases(app.editor)
+    if tab._aliases[0] != tab.edits:
+        tab._aliases = (tab.edits, _buffer_aliases(tab.text))
+    return tab._aliases[1]
+
+def _buffer_aliases(txt: tk.Text) -> dict:
+    """Only the text from the first FROM/JOIN on can hold aliases; Tk finds it without copying the buffer."""
+    start = txt.search(r"\y(?:FROM|JOIN)\y", "1.0", "end", regexp=True, nocase=True)
+    return _extract_aliases(txt.get(start, "end-1c")) if start else {}
 
 def attach_autocomplete(app: App):
     app._ac = _ACPopup(app, on_commit=lambda val: _ac_commit(app, val))
-    app.bind("<Control-space>", lambda e: _ac_trigger(app))
-    app.editor.bind("<KeyRelease-period>", lambda e: _ac_trigger(app), add=True)
-
-    def _ac_visible(): return hasattr(app, "_ac") and app._ac.is_visible()
-    app.editor.bind("<Up>",     lambda e: (app._ac.list.event_generate("<Up>"),     "break")[1] if _ac_visible() else None, add=True)
-    app.editor.bind("<Down>",   lambda e: (app._ac.list.event_generate("<Down>"),   "break")[1] if _ac_visible() else None, add=True)
-    app.editor.bind("<Return>", lambda e: (app._ac.list.event_generate("<Return>"), "break")[1] if _ac_visible() else None, add=True)
-    app.editor.bind("<Tab>",    lambda e: (app._ac.list.event_generate("<Tab>"),    "break")[1] if _ac_visible() else None, add=True)
-    app.editor.bind("<Button-1>", lambda e: app._ac.hide(), add=True)
-    app.editor.bind("<Key>",      lambda e: app._ac.hide(), add=True)
+    app.bind("<Control-space>", app._ac.trigger)
+    app._ac_root = None  # (editor, rootx, rooty) while nothing has moved or resized
+    app.bind("<Configure>", lambda e: setattr(app, "_ac_root", None), add=True)
+    app._ac.bind_editor(app.editor)
 
 def _collect_catalog(app: App):
+    """(schemas, tables, cols_by_table, tables_by_schema, table_by_norm); the middle two index candidates
+    by their dotted parent, the last maps _norm_table_name(table) back to its display name.
+    Rebuilt only when the catalog version changes; callers must not mutate the result."""
+    version, cached = app._ac_catalog
+    if version == app.catalog.version or (cached is not None and app._query_cancel is not None):
+        return cached  # a running script may be re-attaching schemas; keep the last snapshot till it ends
     schemas = sorted(set(app.catalog.schemas.keys()))
     tables_disp = []
     cols_by_table = {}
@@ -1998,59 +2853,53 @@ def _collect_catalog(app: App):
         disp = app.catalog.names.to_display(sch, internal) or internal
         full = f"{sch}.{disp}"
         tables_disp.append(full)
-        if full in app._catalog_cols_cache:
-            cols_by_table[full] = app._catalog_cols_cache[full]
-        else:
-            try:
-                ddesc = app.catalog.describe(sch, internal)
-                field = "colname" if "colname" in ddesc.columns else ddesc.columns[0]
-                cols = ddesc[field].astype(str).tolist()
-            except Exception:
-                cols = []
-            app._catalog_cols_cache[full] = cols
-            cols_by_table[full] = cols
-    return schemas, sorted(set(tables_disp)), cols_by_table
+        cols = app._catalog_cols_cache.get(full)
+        if cols is None:
+            cols = app._catalog_cols_cache[full] = app.catalog.column_names(sch, internal)
+        cols_by_table[full] = cols
+    tables = sorted(set(tables_disp))
+    tables_by_schema, table_by_norm = {}, {}
+    for t in tables:  # sorted and unique, so each schema's list is too
+        tables_by_schema.setdefault(t.split(".", 1)[0], []).append(t)
+        table_by_norm.setdefault(_norm_table_name(t), t)
+    result = schemas, tables, cols_by_table, tables_by_schema, table_by_norm
+    app._ac_catalog = (app.catalog.version, result)
+    return result
+
+def _ac_items(app: App, parent: str, aliases: dict) -> list[str]:
+    """Sorted candidates for a token whose dotted parent is `parent` ("" when the token has no dot)."""
+    schemas, tables, cols_by_table, tables_by_schema, table_by_norm = _collect_catalog(app)
+    # Candidates hang off their dotted parent (schema -> tables, table/alias -> columns): one dict lookup, no scans.
+    # Keywords, schemas and tables are kept sorted-unique, so the no-dot list is a linear merge, not a sort.
+    if not parent:
+        return [k for k, _ in groupby(heapq.merge(_SQL_KW_SORTED, schemas, tables, sorted(aliases)))]
+    if "." not in parent and parent not in aliases:
+        return tables_by_schema.get(parent, [])
+    ref_disp = parent if "." in parent else _resolve_table_display(aliases[parent], table_by_norm)
+    return sorted({f"{parent}.{c}" for c in cols_by_table.get(ref_disp, [])})
 
 def _ac_trigger(app: App):
-    sql = app.editor.get("1.0", tk.END)
-    aliases = _extract_aliases(sql)
+    aliases = _editor_aliases(app)
     tok, L, R = _token_at_cursor(app.editor)
 
-    schemas, tables, cols_by_table = _collect_catalog(app)
-    tables_set = set(tables)
-
-    all_cols = []
-    for t in tables:
-        for c in cols_by_table.get(t, []):
-            all_cols.append(f"{t}.{c}")
-    for ali, ref in aliases.items():
-        ref_disp = _resolve_table_display(ref, tables)
-        acols = cols_by_table.get(ref_disp, [])
-        all_cols.extend([f"{ali}.{c}" for c in acols])
-
-    items = []
-    if "." in tok:
-        parts = tok.split(".")
-        if len(parts) == 1:
-            items = schemas
-        elif len(parts) == 2:
-            prefix = parts[0]
-            if prefix in aliases:
-                items = [c for c in all_cols if c.startswith(prefix + ".")]
-            else:
-                items = [t for t in tables if t.startswith(prefix + ".")]
-        elif len(parts) >= 3:
-            pref = ".".join(parts[:2]) + "."
-            items = [c for c in all_cols if c.startswith(pref)]
+    # Same parent, catalog and aliases as last time (e.g. Ctrl+Space again): reuse the list.
+    parent = ".".join(tok.split(".")[:-1][:2])
+    key = (parent, app.catalog.version, aliases)
+    if app._ac_last is not None and app._ac_last[0] == key:
+        items = app._ac_last[1]
     else:
-        items = _SQL_KW + schemas + tables + list(aliases.keys())
+        items = _ac_items(app, parent, aliases)
+        app._ac_last = (key, items)
 
     bbox = app.editor.bbox(tk.INSERT)
     if not bbox: return
-    x = app.editor.winfo_rootx() + bbox[0]
-    y = app.editor.winfo_rooty() + bbox[1] + bbox[3]
+    if app._ac_root is None or app._ac_root[0] is not app.editor:  # reset by <Configure> anywhere in the window
+        app._ac_root = (app.editor, app.editor.winfo_rootx(), app.editor.winfo_rooty())
+    _, rx, ry = app._ac_root
+    x = rx + bbox[0]
+    y = ry + bbox[1] + bbox[3]
     app._ac_span = (L, R)
-    app._ac.show(x, y, sorted(set(items)))
+    app._ac.show(x, y, items)
 
 def _ac_commit(app: App, value):
     if not value:
@@ -2058,33 +2907,34 @@ def _ac_commit(app: App, value):
     L, R = app._ac_span
     cur = app.editor.index(tk.INSERT)
     linestart = f"{cur} linestart"
-    line = app.editor.get(linestart, f"{linestart} lineend")
 
-    sql_all = app.editor.get("1.0", tk.END)
-    schemas, tables, cols_by_table = _collect_catalog(app)
-    aliases = set(_extract_aliases(sql_all).keys())
+    bare = {*_collect_catalog(app)[0], *_editor_aliases(app)}  # schema/alias first parts stay unquoted
 
-    if value.upper() in _SQL_KW:
+    if value.upper() in _SQL_KW_SET:
         final = value
+    elif "." not in value:  # single identifier: no split needed
+        tok = value.strip()
+        final = value if not tok else tok if tok in bare else _quote_ident_for_sql(tok)
     else:
-        parts = [p.strip() for p in re.split(r'\s*\.\s*', value) if p.strip()]
+        parts = [p.strip() for p in _RE_DOT_WS.split(value) if p.strip()]
         if not parts:
             final = value
         else:
             out = []
             for i, tok in enumerate(parts):
-                if i == 0 and (tok in schemas or tok in aliases):
+                if i == 0 and tok in bare:
                     out.append(tok)
                 else:
                     out.append(_quote_ident_for_sql(tok))
             final = ".".join(out)
 
-    before, after = line[:L], line[R:]
-    newline = before + final + after
-    app.editor.delete(linestart, f"{linestart} lineend")
-    app.editor.insert(linestart, newline)
-    app.editor.mark_set(tk.INSERT, f"{linestart}+{len(before)+len(final)}c")
-    app._apply_sql_highlighting()
+    # Only the token span changes; highlighting follows on the tab's usual debounce.
+    start = f"{linestart}+{L}c"
+    app.editor.delete(start, f"{linestart}+{R}c")
+    app.editor.insert(start, final)
+    app.editor.mark_set(tk.INSERT, f"{linestart}+{L + len(final)}c")
+    tab = app._editor_tabs.get(app.ed_nb.select())
+    if tab: app._schedule_highlight(tab)
 
 
 if __name__ == "__main__":